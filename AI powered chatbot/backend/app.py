@@ -3,129 +3,110 @@ from flask_cors import CORS
 import logging
 import threading
 import time
-import redis
-import json
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from flask_limiter.errors import RateLimitExceeded
-import warnings
+from functools import wraps
 import signal
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from logging_setup import REQUEST_LOGGER, setup_logging
+from metrics import REGISTRY, stage_histogram
+from ratelimit import RateLimiter
 
-# Suppress in-memory rate limit warnings for local development
-warnings.filterwarnings("ignore", category=UserWarning, module="flask_limiter")
-
-# ✅ Initialize Flask app with correct frontend paths
-app = Flask(
-    __name__,
-    template_folder="../frontend/templates",  # Ensure correct path
-    static_folder="../frontend/static"
-)
-
-# Enable CORS (Allow all origins temporarily for debugging)
-CORS(app)
-
-# ✅ Configure logging
-logging.basicConfig(
-    filename="chatbot.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    filemode="a",
-)
-
-# ✅ Try connecting to Redis for rate limiting
-redis_client = None
-storage_uri = "memory://"  # Default to in-memory if Redis fails
-
-try:
-    redis_client = redis.Redis(host="localhost", port=6379, db=0, decode_responses=True)
-    redis_client.ping()
-    logging.info("✅ Redis connection established.")
-    storage_uri = "redis://localhost:6379/0"
-except redis.exceptions.ConnectionError:
-    logging.warning("⚠️ Redis not available. Falling back to in-memory rate limiting.")
-
-# ✅ Setup rate limiting (Defaults to in-memory if Redis is unavailable)
-limiter = Limiter(get_remote_address, app=app, storage_uri=storage_uri)
-
-# ✅ Load FAQ data from JSON file
-FAQ_FILE = os.path.join(os.path.dirname(__file__), "../backend/database/faq_data.json")  # Ensure correct path
-
-def load_faq_data():
-    """Load FAQs from the JSON file."""
-    try:
-        if not os.path.exists(FAQ_FILE):
-            logging.error(f"❌ FAQ file not found: {FAQ_FILE}")
-            return []
-        with open(FAQ_FILE, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except json.JSONDecodeError:
-        logging.error("❌ Failed to parse JSON data. Check the FAQ file format.")
-        return []
-    except Exception as e:
-        logging.error(f"❌ Unexpected error loading FAQ data: {str(e)}")
-        return []
-
-faq_data = load_faq_data()
-
-def find_answer(user_input):
-    """Finds the best-matching answer in the FAQ data."""
-    user_input = user_input.lower()
-    for faq in faq_data:
-        if user_input in faq["question"].lower():
-            return faq["answer"]
-    return "I'm sorry, I couldn't find an answer to your question."
-
-# ✅ Serve the frontend UI
-@app.route("/")
-def home():
-    """Render the chatbot UI."""
-    try:
-        logging.info("✅ Home page accessed")
-        return render_template("index.html")  # Ensure it exists in templates/
-    except Exception as e:
-        logging.error(f"❌ Error loading home page: {str(e)}")
-        return jsonify({"error": "Internal Server Error"}), 500
-
-@app.route("/chat", methods=["POST"])
-@limiter.limit("3 per 10 seconds")  # Apply rate limiting
-def chat():
-    """Handles user messages and returns chatbot responses."""
+# Importing this module is cheap: spaCy, FAISS and Redis are only loaded in the
+# startup phase (ChatService.warm_up), so a worker answers /health right away
+# and reports /ready once the engine is loaded.
+
+request_log = logging.getLogger(REQUEST_LOGGER)
+
+PARSE_SECONDS = stage_histogram("parse")
+SERIALIZE_SECONDS = stage_histogram("serialize")
+
+def connect_redis():
+    """Returns a connected Redis client, or None if Redis is unavailable."""
     try:
-        data = request.get_json()
-
-        # Validate request
-        if not data or "message" not in data:
-            logging.warning("400 - Bad Request: Missing 'message' field.")
-            return jsonify({"error": "Missing 'message' in request"}), 400
-
-        user_input = data["message"].strip()
-        if not user_input:
-            logging.warning("400 - Bad Request: Empty message received.")
-            return jsonify({"error": "Empty message received"}), 400
-
-        # Find chatbot response
-        response = find_answer(user_input)
-        logging.info(f"User: {user_input} | Bot: {response}")
-
-        return jsonify({"response": response})
-    
-    except Exception as e:
-        logging.error(f"500 - Internal Server Error: {str(e)}", exc_info=True)
-        return jsonify({"error": "Internal server error"}), 500
-
-# ✅ Handle Rate Limit Exceeded
-@app.errorhandler(RateLimitExceeded)
-def rate_limit_exceeded(e):
-    logging.warning(f"429 - Rate Limit Exceeded: {e.description}")
-    return jsonify({"error": "Too many requests, slow down!"}), 429
-
-# ✅ Validate JSON before requests
-@app.before_request
-def validate_json():
-    if request.method == "POST" and not request.is_json:
-        abort(400, description="Request must be JSON")
+        import redis
+        client = redis.Redis(host="localhost", port=6379, db=0, decode_responses=True)
+        client.ping()
+        logging.info("✅ Redis connection established.")
+        return client
+    except Exception:
+        logging.warning("⚠️ Redis not available. Falling back to shared-memory rate limiting.")
+        return None
+
+class ChatService:
+    """Owns the chatbot engine, its worker pool and the rate limiter of one worker process."""
+
+    def __init__(self):
+        # ✅ Setup rate limiting: a token bucket per client IP, shared by every worker through
+        # Redis, or through a memory-mapped file on this host if Redis is unavailable.
+        # Defaults match the old "3 per 10 seconds": bursts of 3, refilled at 0.3 tokens/s.
+        self.limiter = RateLimiter(
+            rate=float(os.getenv("CHAT_RATE", 0.3)),
+            capacity=float(os.getenv("CHAT_BURST", 3)),
+        )
+
+        # ✅ NLP work runs on a bounded pool so request threads only wait on a future.
+        # CHAT_MAX_PENDING caps queued + running chats; beyond it requests are shed with
+        # a 503 instead of queueing without bound and dragging p99 up for everyone.
+        self.workers = int(os.getenv("CHAT_WORKERS", 32))  # At least CHAT_BATCH_SIZE so batches can fill
+        self.max_pending = int(os.getenv("CHAT_MAX_PENDING", 256))
+        self.timeout = float(os.getenv("CHAT_TIMEOUT", 5.0))  # Seconds
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="chat")
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+
+        self.redis_client = None
+        self.chatbot = None
+        self.ready = threading.Event()
+        self.error = None
+
+    def start(self, background=True):
+        """Begins the startup phase, on a thread unless background is False."""
+        if background:
+            threading.Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+        else:
+            self.warm_up()
+
+    def warm_up(self):
+        """Connects to Redis, loads the chatbot engine and primes it; sets ready when done."""
+        start = time.perf_counter()
+        try:
+            self.redis_client = connect_redis()
+            if self.redis_client is not None:
+                self.limiter.attach_redis(self.redis_client)
+
+            from chatbot import Chatbot  # Pulls in spaCy and FAISS
+
+            # ✅ Load the semantic chatbot engine (exact-match table + FAISS index) once per process.
+            # Concurrent searches are micro-batched: up to CHAT_BATCH_SIZE queries, waiting at most CHAT_BATCH_WAIT_MS.
+            # Answers are cached per normalised question and per near-duplicate embedding, shared through Redis when it is up.
+            self.chatbot = Chatbot(
+                batch_size=int(os.getenv("CHAT_BATCH_SIZE", 32)),
+                batch_wait_ms=float(os.getenv("CHAT_BATCH_WAIT_MS", 2.0)),
+                redis_client=self.redis_client,
+            )
+            self.chatbot.warm_up()
+            self.ready.set()
+            logging.info(f"✅ Chatbot ready in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            self.error = str(e)
+            logging.error(f"❌ Chatbot failed to start: {str(e)}", exc_info=True)
+
+    def submit(self, user_input):
+        """Queues a chat on the worker pool; returns None if the pool is saturated."""
+        if not self.slots.acquire(blocking=False):
+            return None
+        try:
+            future = self.executor.submit(self.chatbot.get_response, user_input)
+        except RuntimeError:  # Executor shut down
+            self.slots.release()
+            return None
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.chatbot is not None:
+            self.chatbot.close()
 
 # ✅ Background Task for Periodic Logging
 def background_task():
@@ -134,20 +115,152 @@ def background_task():
         logging.info("⏳ Background task running...")
         time.sleep(60)  # Execute every 60 seconds
 
-# Start a background monitoring thread
-thread = threading.Thread(target=background_task, daemon=True)
-thread.start()
+def create_app(warm_up=None):
+    """
+    Builds the Flask app and starts the chatbot's startup phase.
+
+    warm_up (default: the CHAT_WARM_UP environment variable, else "background"):
+    "background" loads the engine on a thread so /health answers immediately and
+    /ready turns 200 once it is loaded; "eager" loads before returning; "none"
+    leaves it to the caller (app.extensions["chat_service"].start()).
+
+    Serve with e.g. `gunicorn "app:create_app()"` and route traffic on /ready.
+    """
+    setup_logging()
+
+    # ✅ Initialize Flask app with correct frontend paths
+    app = Flask(
+        __name__,
+        template_folder="../frontend/templates",  # Ensure correct path
+        static_folder="../frontend/static"
+    )
+
+    # Enable CORS (Allow all origins temporarily for debugging)
+    CORS(app)
 
-# ✅ Graceful Shutdown Handler
-def shutdown_handler(signal, frame):
-    logging.info("🔴 Shutting down gracefully...")
-    sys.exit(0)
+    service = ChatService()
+    app.extensions["chat_service"] = service
 
-signal.signal(signal.SIGINT, shutdown_handler)
+    def rate_limited(view):
+        """Rejects the request with 429 once the client's token bucket is empty."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            allowed, retry_after = service.limiter.allow(request.remote_addr)
+            if not allowed:
+                logging.warning(f"429 - Rate Limit Exceeded: {request.remote_addr}")
+                response = jsonify({"error": "Too many requests, slow down!"})
+                response.headers["Retry-After"] = str(max(1, round(retry_after)))
+                return response, 429
+            return view(*args, **kwargs)
+        return wrapper
+
+    # ✅ Serve the frontend UI
+    @app.route("/")
+    def home():
+        """Render the chatbot UI."""
+        try:
+            request_log.info("✅ Home page accessed")
+            return render_template("index.html")  # Ensure it exists in templates/
+        except Exception as e:
+            logging.error(f"❌ Error loading home page: {str(e)}")
+            return jsonify({"error": "Internal Server Error"}), 500
+
+    @app.route("/chat", methods=["POST"])
+    @rate_limited  # Apply rate limiting
+    def chat():
+        """Handles user messages and returns chatbot responses."""
+        try:
+            with PARSE_SECONDS.time():
+                data = request.get_json()
+
+                # Validate request
+                if not data or "message" not in data:
+                    logging.warning("400 - Bad Request: Missing 'message' field.")
+                    return jsonify({"error": "Missing 'message' in request"}), 400
+
+                user_input = data["message"].strip()
+
+            if not user_input:
+                logging.warning("400 - Bad Request: Empty message received.")
+                return jsonify({"error": "Empty message received"}), 400
+
+            if not service.ready.is_set():
+                response = jsonify({"error": "The chatbot is starting, please retry shortly"})
+                response.headers["Retry-After"] = "1"
+                return response, 503
+
+            # Find chatbot response on the worker pool
+            start = time.perf_counter()
+            future = service.submit(user_input)
+            if future is None:
+                logging.warning("503 - Service Unavailable: chat workers saturated.")
+                return jsonify({"error": "Server busy, please retry shortly"}), 503
+
+            try:
+                response = future.result(timeout=service.timeout)
+            except FutureTimeout:
+                future.cancel()
+                logging.warning(f"504 - Gateway Timeout: no answer within {service.timeout}s.")
+                return jsonify({"error": "The chatbot took too long to respond"}), 504
+
+            request_log.info("chat", extra={
+                "user_message": user_input,
+                "response_chars": len(response),
+                "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            })
+
+            with SERIALIZE_SECONDS.time():
+                return jsonify({"response": response})
+        
+        except Exception as e:
+            logging.error(f"500 - Internal Server Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "Internal server error"}), 500
+
+    # ✅ Liveness: the process is up and serving requests
+    @app.route("/health")
+    def health():
+        return jsonify({"status": "ok"})
+
+    # ✅ Readiness: the chatbot engine is loaded and warmed up
+    @app.route("/ready")
+    def ready():
+        if service.ready.is_set():
+            return jsonify({"status": "ready"})
+        if service.error is not None:
+            return jsonify({"status": "failed", "error": service.error}), 503
+        return jsonify({"status": "loading"}), 503
+
+    # ✅ Expose batching, cache and per-stage latency metrics in Prometheus text format
+    @app.route("/metrics")
+    def metrics():
+        return REGISTRY.render(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+    # ✅ Validate JSON before requests
+    @app.before_request
+    def validate_json():
+        if request.method == "POST" and not request.is_json:
+            abort(400, description="Request must be JSON")
+
+    # Start a background monitoring thread
+    threading.Thread(target=background_task, daemon=True).start()
+
+    warm_up = warm_up or os.getenv("CHAT_WARM_UP", "background")
+    if warm_up != "none":
+        service.start(background=warm_up == "background")
+    return app
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5001))  # Allow dynamic port selection
     debug_mode = os.getenv("DEBUG", "True").lower() == "true"
+    app = create_app()
+
+    # ✅ Graceful Shutdown Handler
+    def shutdown_handler(signal, frame):
+        logging.info("🔴 Shutting down gracefully...")
+        app.extensions["chat_service"].shutdown()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, shutdown_handler)
 
     logging.info(f"🚀 Starting Flask server on port {port}, debug={debug_mode}")
     app.run(host="0.0.0.0", port=port, threaded=True, debug=debug_mode)
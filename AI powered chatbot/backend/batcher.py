@@ -0,0 +1,102 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import REGISTRY
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls into batches for a function that works on lists.
+
+    Callers submit single items and get a Future. A background thread collects
+    items until max_batch_size are waiting or the first one has waited
+    max_wait_ms, calls process_batch once on the whole list, and fans the
+    results back out to the futures.
+    """
+
+    def __init__(self, process_batch, max_batch_size=32, max_wait_ms=2.0, name="batcher"):
+        """
+        process_batch takes a list of items and returns a list of results in the same order.
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._closed = False
+
+        self.batch_sizes = REGISTRY.histogram(
+            f"{name}_batch_size", "Items processed per batch.", buckets=BATCH_SIZE_BUCKETS)
+        self.queue_seconds = REGISTRY.histogram(
+            f"{name}_queue_seconds", "Time items wait before their batch starts.")
+        self.batch_seconds = REGISTRY.histogram(
+            f"{name}_batch_seconds", "Time spent processing one batch.")
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """Queues one item; the returned Future resolves to its result."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed.")
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item):
+        """Submits item and blocks until its batch has been processed."""
+        return self.submit(item).result()
+
+    def close(self):
+        """Stops the worker after it drains the items already queued."""
+        self._closed = True
+        self._queue.put(None)
+
+    def _collect(self):
+        """Blocks for one item, then gathers more until the batch is full or the wait expires."""
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)  # Finish this batch, then stop
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            start = time.perf_counter()
+            self.batch_sizes.observe(len(batch))
+            for _, _, enqueued in batch:
+                self.queue_seconds.observe(start - enqueued)
+
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.process_batch(items)
+            except Exception as e:
+                logging.error(f"Batch of {len(items)} failed: {str(e)}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                self.batch_seconds.observe(time.perf_counter() - start)
+
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import db
+import model
+from chatbot import Chatbot, normalize_question
+from logging_setup import setup_logging
+
+QUERY_KINDS = ("exact", "paraphrase", "miss")
+FILLERS = ["please", "quickly", "exactly", "today", "again", "actually"]
+MISS_WORDS = ["quantum", "banana", "glacier", "violin", "nebula", "pancake", "lighthouse",
+              "tornado", "origami", "cactus", "saxophone", "volcano", "marathon", "walrus"]
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the Redis features the backend uses: get/set with
+    expiry, incr, ping, and the token-bucket script registered by ratelimit.py.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def ping(self):
+        return True
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._data.get(key, (None, None))
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (str(value), time.monotonic() + ex if ex else None)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._data.get(key, ("0", None))[0]) + 1
+            self._data[key] = (str(value), None)
+            return value
+
+    def register_script(self, script):
+        buckets = {}
+
+        def token_bucket(keys, args):
+            rate, capacity = float(args[0]), float(args[1])
+            with self._lock:
+                tokens, ts = buckets.get(keys[0], (capacity, time.time()))
+                now = time.time()
+                tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                buckets[keys[0]] = (tokens, now)
+            return [int(allowed), 0 if allowed else int(np.ceil((1 - tokens) / rate * 1000))]
+
+        return token_bucket
+
+
+def rss_mb():
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def scale_faq(faq_data, size, seed=0):
+    """Grows the FAQ to size entries with reworded copies of the bundled questions."""
+    rng = np.random.default_rng(seed)
+    entries = [{"question": entry["question"], "answer": entry["answer"]} for entry in faq_data[:size]]
+    while len(entries) < size:
+        source = faq_data[rng.integers(len(faq_data))]
+        entries.append({
+            "question": f"{paraphrase(source['question'], rng)} ({len(entries)})",
+            "answer": source["answer"],
+        })
+    return entries
+
+
+def paraphrase(question, rng):
+    """A light rewording: changed case and punctuation, one word dropped or swapped, a filler added."""
+    words = question.rstrip("?.!").split()
+    if len(words) > 3:
+        i = rng.integers(1, len(words) - 1)
+        if rng.random() < 0.5:
+            del words[i]
+        else:
+            words[i], words[i + 1] = words[i + 1], words[i]
+    words.insert(rng.integers(len(words) + 1), FILLERS[rng.integers(len(FILLERS))])
+    text = " ".join(words)
+    return text.upper() if rng.random() < 0.1 else text.lower()
+
+
+def make_queries(questions, n_queries, mix, seed=0):
+    """Draws (kind, text) queries with the given share of exact, paraphrase and miss queries."""
+    rng = np.random.default_rng(seed)
+    shares = np.array([mix[kind] for kind in QUERY_KINDS], dtype=float)
+    kinds = rng.choice(QUERY_KINDS, size=n_queries, p=shares / shares.sum())
+
+    queries = []
+    for kind in kinds:
+        question = questions[rng.integers(len(questions))]
+        if kind == "exact":
+            queries.append((kind, question))
+        elif kind == "paraphrase":
+            queries.append((kind, paraphrase(question, rng)))
+        else:
+            queries.append((kind, " ".join(rng.choice(MISS_WORDS, size=rng.integers(3, 7)))))
+    return queries
+
+
+def use_dataset(entries, workdir):
+    """Points the database and index at a private copy of entries and resets the singleton."""
+    os.makedirs(workdir, exist_ok=True)
+    db.FAQ_FILE = os.path.join(workdir, "faq_data.json")
+    db.OPS_FILE = os.path.join(workdir, "faq_ops.jsonl")
+    model.INDEX_DIR = os.path.join(workdir, "index")
+    with open(db.FAQ_FILE, "w", encoding="utf-8") as file:
+        json.dump(entries, file)
+    if os.path.exists(db.OPS_FILE):
+        os.remove(db.OPS_FILE)
+    db.DatabaseConnection._instance = None
+
+
+def time_calls(call, queries, concurrency):
+    """Runs call(text) for every query on concurrency threads; returns (latencies, wall seconds)."""
+    latencies = np.empty(len(queries))
+
+    def timed(i):
+        start = time.perf_counter()
+        call(queries[i][1])
+        latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrency <= 1:
+        for i in range(len(queries)):
+            timed(i)
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(timed, range(len(queries))))
+    return latencies, time.perf_counter() - start
+
+
+def summarize(latencies, wall_seconds):
+    return {
+        "qps": len(latencies) / wall_seconds if wall_seconds else 0.0,
+        "p50_ms": np.percentile(latencies, 50) * 1e3,
+        "p95_ms": np.percentile(latencies, 95) * 1e3,
+        "p99_ms": np.percentile(latencies, 99) * 1e3,
+    }
+
+
+def stage_costs(chatbot, queries, repeats=200):
+    """Mean single-call cost in ms of each stage of Chatbot.get_response, measured in isolation."""
+    texts = [text for _, text in queries[:repeats]]
+    vectors = chatbot.nlp.embed(texts, normalize=True)
+    stages = {
+        "normalize+exact": lambda i: chatbot.query_exact_match(texts[i]),
+        "embed": lambda i: chatbot.nlp.embed([texts[i]], normalize=True),
+        "search": lambda i: chatbot.nlp.search_vectors(vectors[i:i + 1], chatbot.top_k),
+        "cache_lookup": lambda i: chatbot.cache.get(normalize_question(texts[i])) if chatbot.cache else None,
+    }
+    costs = {}
+    for name, call in stages.items():
+        start = time.perf_counter()
+        for i in range(len(texts)):
+            call(i)
+        costs[f"{name}_ms"] = (time.perf_counter() - start) / len(texts) * 1e3
+    return costs
+
+
+def app_client_call(flask_app):
+    """Returns call(text) that POSTs to /chat through a per-thread Flask test client."""
+    local = threading.local()
+
+    def call(text):
+        if not hasattr(local, "client"):
+            local.client = flask_app.test_client()
+        response = local.client.post("/chat", json={"message": text})
+        if response.status_code != 200:
+            raise RuntimeError(f"/chat returned {response.status_code}")
+
+    return call
+
+
+def run(sizes, target, n_queries, concurrency, mix, use_local_redis, cache):
+    with open(os.path.join(os.path.dirname(__file__), "database", "faq_data.json"), encoding="utf-8") as file:
+        bundled = json.load(file)
+
+    redis_client = LocalRedis() if use_local_redis else None
+    workdir = tempfile.mkdtemp(prefix="chatbot-bench-")
+    setup_logging(log_file=os.path.join(workdir, "benchmark.log"))
+    flask_app = None
+    results = []
+
+    for size in sizes:
+        entries = scale_faq(bundled, size)
+        use_dataset(entries, os.path.join(workdir, str(size)))
+
+        # Index build time, measured on its own before the chatbot loads the persisted copy
+        nlp = model.NLPModel()
+        start = time.perf_counter()
+        nlp.build_faiss_index(entries)
+        build_seconds = time.perf_counter() - start
+        database = db.DatabaseConnection()
+        nlp.save_index(source_stamp=database.source_stamp(), ops_offset=database.ops_offset)
+        del nlp
+
+        chatbot = Chatbot(cache=cache, redis_client=redis_client)
+        if target == "app":
+            if flask_app is None:
+                # Lift the per-client rate limit; the benchmark supplies the engine instead of the startup phase
+                os.environ.setdefault("CHAT_RATE", "1e9")
+                os.environ.setdefault("CHAT_BURST", "1e9")
+                from app import create_app
+                flask_app = create_app(warm_up="none")
+                if redis_client is not None:
+                    flask_app.extensions["chat_service"].limiter.attach_redis(redis_client)
+            service = flask_app.extensions["chat_service"]
+            if service.chatbot is not None:
+                service.chatbot.close()
+            service.chatbot = chatbot
+            service.ready.set()
+            call = app_client_call(flask_app)
+        else:
+            call = chatbot.get_response
+
+        queries = make_queries([entry["question"] for entry in entries], n_queries, mix)
+        call(queries[0][1])  # Warm-up
+        latencies, wall_seconds = time_calls(call, queries, concurrency)
+
+        row = {"target": target, "faq_size": size, "build_s": build_seconds, "rss_mb": rss_mb()}
+        row.update(summarize(latencies, wall_seconds))
+        kinds = np.array([kind for kind, _ in queries])
+        for kind in QUERY_KINDS:
+            if (kinds == kind).any():
+                row[f"{kind}_p99_ms"] = np.percentile(latencies[kinds == kind], 99) * 1e3
+        row.update(stage_costs(chatbot, queries))
+        results.append(row)
+        print(f"✅ {target} @ {size} FAQs: {row['qps']:.0f} QPS, p99 {row['p99_ms']:.2f} ms, build {build_seconds:.2f}s")
+
+        if target != "app":
+            chatbot.close()
+
+    return results
+
+
+def print_table(rows):
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    cells = [[f"{row.get(column, ''):.2f}" if isinstance(row.get(column), float) else str(row.get(column, ""))
+              for column in columns] for row in rows]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for line in cells:
+        print("  ".join(cell.rjust(width) for cell, width in zip(line, widths)))
+
+
+def parse_mix(text):
+    """Parses "exact=0.4,paraphrase=0.4,miss=0.2"."""
+    mix = dict.fromkeys(QUERY_KINDS, 0.0)
+    for part in text.split(","):
+        kind, share = part.split("=")
+        if kind not in mix:
+            raise argparse.ArgumentTypeError(f"Unknown query kind: {kind}")
+        mix[kind] = float(share)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the chatbot engine and the /chat endpoint.")
+    parser.add_argument("--target", choices=["chatbot", "app"], default="chatbot",
+                        help="Drive Chatbot.get_response directly or POST /chat through the Flask app.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1428, 10000, 100000], help="FAQ set sizes.")
+    parser.add_argument("--queries", type=int, default=5000, help="Queries per size.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent callers.")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("exact=0.4,paraphrase=0.4,miss=0.2"))
+    parser.add_argument("--local-redis", action="store_true", help="Use the in-process Redis stand-in.")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache.")
+    parser.add_argument("--out", help="Optional JSON path for the results.")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.target, args.queries, args.concurrency, args.mix,
+                 args.local_redis, cache=not args.no_cache)
+    print("\n📊 Benchmark results:")
+    print_table(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4, default=float)
@@ -0,0 +1,20 @@
+from db import DatabaseConnection
+from model import INDEX_DIR, NLPModel
+from logging_setup import setup_logging
+import argparse
+import time
+
+# Offline step: embed the FAQ once and persist the FAISS index for every worker to load
+parser = argparse.ArgumentParser(description="Build the persisted FAQ semantic index.")
+parser.add_argument("--model", default="en_core_web_md", help="spaCy model used for embeddings.")
+parser.add_argument("--out", default=INDEX_DIR, help="Output directory for the index files.")
+args = parser.parse_args()
+setup_logging()
+
+start = time.perf_counter()
+db = DatabaseConnection()
+nlp = NLPModel(args.model)
+nlp.build_faiss_index(db.get_faq_data())
+nlp.save_index(args.out, source_stamp=db.source_stamp(), ops_offset=db.ops_offset)
+
+print(f"✅ Indexed {len(nlp.faq_questions)} FAQ questions in {time.perf_counter() - start:.2f}s -> {args.out}")
@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import REGISTRY
+
+REDIS_PREFIX = "chatbot:answer"
+REDIS_GENERATION_KEY = "chatbot:answer:generation"
+
+
+class ResponseCache:
+    """
+    Two-level cache of chatbot answers.
+
+    Level one maps normalised question text to an answer (an in-process LRU,
+    optionally shared through Redis). Level two keeps the unit embeddings of
+    recently answered questions and returns a stored answer when a new query's
+    embedding has cosine similarity >= similarity_threshold with one of them.
+    Both levels expire entries after ttl seconds and are dropped by invalidate().
+    """
+
+    def __init__(self, max_size=1024, vector_size=256, ttl=600, similarity_threshold=0.95,
+                 redis_client=None, generation_check_interval=1.0):
+        """
+        max_size / vector_size bound the text and vector levels; redis_client, if
+        given, shares level one between workers, and a generation counter in Redis
+        makes an invalidation in one worker clear every worker's local entries.
+        """
+        self.max_size = max_size
+        self.vector_size = vector_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.redis = redis_client
+        self.generation_check_interval = generation_check_interval
+        self._lock = threading.Lock()
+
+        self._text = OrderedDict()
+        self._vectors = None  # (vector_size, dim) float32, allocated on first insert
+        self._vector_answers = [None] * vector_size
+        self._vector_expiry = np.zeros(vector_size)
+        self._vector_used = np.zeros(vector_size)
+
+        self._generation = self._read_generation()
+        self._generation_checked = time.monotonic()
+
+        self.hits = REGISTRY.counter("chatbot_cache_hits_total", "Answers served from the response cache.")
+        self.vector_hits = REGISTRY.counter(
+            "chatbot_cache_vector_hits_total", "Answers served from the near-duplicate vector cache.")
+        self.misses = REGISTRY.counter("chatbot_cache_misses_total", "Response cache misses.")
+
+    # Level one: exact normalised text
+
+    def _redis_key(self, text):
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        return f"{REDIS_PREFIX}:{self._generation}:{digest}"
+
+    def get(self, text):
+        """Returns the cached answer for normalised text, or None."""
+        self._sync_generation()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._text.get(text)
+            if entry is not None:
+                if entry[1] > now:
+                    self._text.move_to_end(text)
+                    self.hits.inc()
+                    return entry[0]
+                del self._text[text]
+
+        if self.redis is not None:
+            try:
+                answer = self.redis.get(self._redis_key(text))
+            except Exception as e:
+                logging.warning(f"Redis cache read failed: {str(e)}")
+                answer = None
+            if answer is not None:
+                self._set_local(text, answer)
+                self.hits.inc()
+                return answer
+
+        self.misses.inc()
+        return None
+
+    def _set_local(self, text, answer):
+        with self._lock:
+            self._text[text] = (answer, time.monotonic() + self.ttl)
+            self._text.move_to_end(text)
+            while len(self._text) > self.max_size:
+                self._text.popitem(last=False)
+
+    def set(self, text, answer):
+        """Caches answer under normalised text."""
+        self._set_local(text, answer)
+        if self.redis is not None:
+            try:
+                self.redis.set(self._redis_key(text), answer, ex=int(self.ttl))
+            except Exception as e:
+                logging.warning(f"Redis cache write failed: {str(e)}")
+
+    # Level two: near-duplicate embeddings
+
+    def get_similar(self, vector):
+        """Returns the answer cached for the most similar unit vector above the threshold, or None."""
+        if self._vectors is None or not vector.any():
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            similarities = self._vectors @ vector
+            similarities[self._vector_expiry <= now] = -1
+            slot = int(np.argmax(similarities))
+            if similarities[slot] < self.similarity_threshold:
+                return None
+            self._vector_used[slot] = now
+            self.vector_hits.inc()
+            return self._vector_answers[slot]
+
+    def set_similar(self, vector, answer):
+        """Caches answer under a unit vector, replacing the least recently used slot."""
+        if not vector.any():
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.vector_size, len(vector)), dtype=np.float32)
+            # Expired and never-used slots have the oldest timestamps, so they go first
+            slot = int(np.argmin(np.where(self._vector_expiry > now, self._vector_used, -1)))
+            self._vectors[slot] = vector
+            self._vector_answers[slot] = answer
+            self._vector_expiry[slot] = now + self.ttl
+            self._vector_used[slot] = now
+
+    # Invalidation
+
+    def _read_generation(self):
+        if self.redis is None:
+            return 0
+        try:
+            return int(self.redis.get(REDIS_GENERATION_KEY) or 0)
+        except Exception as e:
+            logging.warning(f"Redis cache generation read failed: {str(e)}")
+            return 0
+
+    def _sync_generation(self):
+        """Drops local entries if another worker invalidated the shared cache."""
+        if self.redis is None or time.monotonic() - self._generation_checked < self.generation_check_interval:
+            return
+        self._generation_checked = time.monotonic()
+        generation = self._read_generation()
+        if generation != self._generation:
+            self._generation = generation
+            self.clear()
+
+    def clear(self):
+        """Drops this process's entries at both levels."""
+        with self._lock:
+            self._text.clear()
+            self._vector_expiry[:] = 0
+            self._vector_used[:] = 0
+            self._vector_answers = [None] * self.vector_size
+
+    def invalidate(self):
+        """Drops every cached answer, e.g. after the FAQ data changes."""
+        self.clear()
+        if self.redis is not None:
+            try:
+                # Old keys become unreachable and expire through their TTL
+                self._generation = int(self.redis.incr(REDIS_GENERATION_KEY))
+            except Exception as e:
+                logging.warning(f"Redis cache invalidation failed: {str(e)}")
+        logging.info("Response cache invalidated.")
@@ -1,28 +1,167 @@
 from db import DatabaseConnection
 from model import NLPModel
+from batcher import MicroBatcher
+from cache import ResponseCache
+from metrics import stage_histogram
 import random
-import logging
-import openai  # Used for GPT fallback responses
+import threading
 
-# Logging setup
-logging.basicConfig(
-    filename="chatbot.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# Per-stage latency; embed and search are timed once per micro-batch
+EXACT_SECONDS = stage_histogram("exact")
+CACHE_SECONDS = stage_histogram("cache")
+EMBED_SECONDS = stage_histogram("embed")
+SEARCH_SECONDS = stage_histogram("search")
+
+def normalize_question(text):
+    """Canonical form used for exact matching: case-folded with collapsed whitespace."""
+    return " ".join(text.casefold().split())
 
 class Chatbot:
     """Main chatbot logic integrating NLP and database operations."""
     
-    def __init__(self):
+    def __init__(self, semantic_threshold=0.85, top_k=5, batch_size=32, batch_wait_ms=2.0,
+                 cache=True, redis_client=None, sync_interval=1.0):
+        """
+        semantic_threshold is the minimum cosine similarity (0-1) for a semantic
+        answer; top_k is how many candidates each semantic search returns.
+        Concurrent semantic searches are coalesced into batches of up to
+        batch_size queries waiting at most batch_wait_ms; batch_size=1 disables it.
+        cache enables the response cache (pass a ResponseCache to configure it);
+        redis_client, if given, shares its text level between workers.
+        FAQ writes made by other workers are picked up within sync_interval seconds
+        by a background thread, so requests never wait on the FAQ log.
+        """
         self.db = DatabaseConnection()
         self.nlp = NLPModel()
-        self.faq_data = self.db.get_faq_data()
-        self.nlp.build_faiss_index(self.faq_data)
+        faq_data = self.db.get_faq_data()
+        self.semantic_threshold = semantic_threshold
+        self.top_k = top_k
+
+        # Reuse the index written by build_index.py; embed everything only if it is missing or stale
+        self._saved_compactions = self.db.compactions
+        if not self._load_index(faq_data):
+            self.nlp.build_faiss_index(faq_data)
+            self._save_index()
+
+        self.entries = []  # Indexed by FAQ entry id (= FAISS id); None for removed ids
+        self.exact_ids = {}  # Normalised question -> ids of the entries asking it, oldest first
+        self._add_lookups(faq_data)
+
+        if cache is True:
+            cache = ResponseCache(redis_client=redis_client)
+        self.cache = cache or None
+
+        # New and removed FAQs go live in place: lookups, index and cache follow every write,
+        # this worker's at once and other workers' at the next sync
+        self.db.subscribe(self._on_faq_change)
+        self.sync_interval = sync_interval
+        self._closed = threading.Event()
+        self._sync_thread = None
+        if sync_interval:
+            self._sync_thread = threading.Thread(target=self._sync_faq, name="faq-sync", daemon=True)
+            self._sync_thread.start()
+
+        self.search_batcher = None
+        if batch_size > 1:
+            self.search_batcher = MicroBatcher(
+                self._search_batch, max_batch_size=batch_size, max_wait_ms=batch_wait_ms, name="chatbot_search"
+            )
+
+    def _load_index(self, faq_data):
+        """Loads the persisted index and replays the FAQ writes logged after it was saved; False if it must be rebuilt."""
+        if not self.nlp.load_index(source_stamp=self.db.source_stamp()):
+            return False
+        changes = self.db.changes_since(self.nlp.ops_offset)
+        if changes is None:
+            return False
+        removed, added = changes
+        if removed:
+            self.nlp.remove_ids(removed)
+            self.nlp.add_entries(added)
+            # Save the caught-up index so workers started after this one map it without replaying
+            self._save_index()
+        return self.nlp.index.ntotal == len(faq_data)
+
+    def _save_index(self, position=None):
+        """Persists the index as of position, a (source_stamp, ops_offset, compactions) log position; default: now."""
+        stamp, offset, compactions = position or (self.db.source_stamp(), self.db.ops_offset, self.db.compactions)
+        self.nlp.save_index(source_stamp=stamp, ops_offset=offset)
+        self._saved_compactions = compactions
+
+    def _add_lookups(self, entries):
+        """Adds entries to the exact-match table and the id -> entry array."""
+        for entry in entries:
+            if entry["id"] >= len(self.entries):
+                self.entries.extend([None] * (entry["id"] + 1 - len(self.entries)))
+            self.entries[entry["id"]] = entry
+            # The oldest entry wins, as with the old linear scan
+            ids = self.exact_ids.setdefault(normalize_question(entry["question"]), [])
+            ids.append(entry["id"])
+            ids.sort()
+
+    def _remove_lookups(self, ids):
+        for entry_id in ids:
+            entry = self._entry(entry_id)
+            if entry is None:
+                continue
+            self.entries[entry_id] = None
+            key = normalize_question(entry["question"])
+            remaining = [other for other in self.exact_ids.get(key, []) if other != entry_id]
+            if remaining:
+                self.exact_ids[key] = remaining
+            else:
+                self.exact_ids.pop(key, None)
+
+    def _entry(self, entry_id):
+        return self.entries[entry_id] if 0 <= entry_id < len(self.entries) else None
+
+    def _on_faq_change(self, added, removed, local):
+        """Applies a FAQ write to the lookups and the live index without a rebuild."""
+        # Searches may briefly miss a changing entry, but never return one without an answer
+        self.nlp.remove_ids(removed)
+        self._remove_lookups(removed)
+        self._add_lookups(added)
+        self.nlp.add_entries(added)
+        if self.cache is not None:
+            # Only the worker that made the write bumps the shared generation; the others
+            # just drop their own entries, or every write would be counted once per worker
+            if local:
+                self.cache.invalidate()
+            else:
+                self.cache.clear()
+        # Listeners run after the FAQ locks are released, so the log may already be ahead
+        # of this change; save against the position the change brings the index up to
+        position = self.db.notified_position
+        if position[2] != self._saved_compactions:
+            # This worker folded the log into FAQ_FILE, which changes the stamp; without a
+            # fresh save every worker started from now on would re-embed the whole FAQ
+            self._save_index(position)
+
+    def _sync_faq(self):
+        """Applies FAQ writes logged by other workers every sync_interval seconds until close()."""
+        while not self._closed.wait(self.sync_interval):
+            self.db.refresh()
+
+    def close(self):
+        """Stops the FAQ sync thread and the search batcher."""
+        self._closed.set()
+        if self.search_batcher is not None:
+            self.search_batcher.close()
 
     def get_response(self, user_input):
         """Processes user input and returns an appropriate response."""
-        response = self.query_exact_match(user_input) or self.query_semantic_match(user_input)
+        with EXACT_SECONDS.time():
+            response = self.query_exact_match(user_input)
+        if response:
+            return response
+
+        key = normalize_question(user_input)
+        with CACHE_SECONDS.time():
+            response = self.cache.get(key) if self.cache is not None else None
+        if response is None:
+            response = self.query_semantic_match(user_input)
+            if response and self.cache is not None:
+                self.cache.set(key, response)
 
         if not response:
             response = self.generate_fallback_response(user_input)
@@ -31,21 +170,74 @@ class Chatbot:
 
     def query_exact_match(self, user_input):
         """Finds an exact match in the FAQ database."""
-        for entry in self.faq_data:
-            if user_input.lower() == entry["question"].lower():
-                return entry["answer"]
-        return None
+        ids = self.exact_ids.get(normalize_question(user_input))
+        entry = self._entry(ids[0]) if ids else None
+        return entry["answer"] if entry else None
+
+    def _search_batch(self, requests):
+        """
+        Embeds a batch of (query, k, use_cache) requests in one pass and searches
+        every one the vector cache cannot answer with a single FAISS call.
+
+        Returns (vector, cached_answer, scores, ids) per request.
+        """
+        with EMBED_SECONDS.time():
+            vectors = self.nlp.embed([query for query, _, _ in requests], normalize=True)
+        results = [None] * len(requests)
+        misses = []
+        for i, (_, _, use_cache) in enumerate(requests):
+            cached = self.cache.get_similar(vectors[i]) if use_cache and self.cache is not None else None
+            if cached is not None:
+                results[i] = (vectors[i], cached, None, None)
+            else:
+                misses.append(i)
+
+        if misses:
+            with SEARCH_SECONDS.time():
+                scores, ids = self.nlp.search_vectors(vectors[misses], max(requests[i][1] for i in misses))
+            for row, i in enumerate(misses):
+                k = requests[i][1]
+                results[i] = (vectors[i], None, scores[row, :k], ids[row, :k])
+        return results
+
+    def _semantic_search(self, user_input, k, use_cache):
+        request = (user_input, k, use_cache)
+        if self.search_batcher is not None:
+            return self.search_batcher(request)
+        return self._search_batch([request])[0]
+
+    def _candidates(self, scores, ids):
+        candidates = []
+        for i, score in zip(ids, scores):
+            entry = self._entry(i)
+            if entry is not None:
+                candidates.append((entry["question"], entry["answer"], float(score)))
+        return candidates
+
+    def semantic_candidates(self, user_input, k=None):
+        """Returns up to k (question, answer, score) candidates, highest cosine score first."""
+        _, _, scores, ids = self._semantic_search(user_input, k or self.top_k, use_cache=False)
+        return self._candidates(scores, ids)
 
     def query_semantic_match(self, user_input):
         """Finds the closest match using FAISS vector search."""
-        best_match, distance = self.nlp.find_similar_question(user_input)
+        vector, cached, scores, ids = self._semantic_search(user_input, self.top_k, use_cache=True)
+        if cached is not None:
+            return cached
 
-        if best_match and distance < 5.0:  # Lower distance = better match
-            for entry in self.faq_data:
-                if entry["question"] == best_match:
-                    return entry["answer"]
+        candidates = self._candidates(scores, ids)
+        if candidates and candidates[0][2] >= self.semantic_threshold:
+            if self.cache is not None:
+                self.cache.set_similar(vector, candidates[0][1])
+            return candidates[0][1]
         return None
 
+    def warm_up(self):
+        """Runs one query through every stage so the first real request doesn't pay for lazy loading."""
+        self.query_exact_match("warm up")
+        vectors = self.nlp.embed(["How do I reset my password?"], normalize=True)
+        self.nlp.search_vectors(vectors, self.top_k)
+
     def generate_fallback_response(self, user_input):
         """Generates fallback responses using GPT or predefined answers."""
         predefined_fallbacks = [
@@ -55,7 +247,10 @@ class Chatbot:
         return random.choice(predefined_fallbacks)
 
 # Usage Example
-chatbot = Chatbot()
-user_query = "How do I reset my password?"
-response = chatbot.get_response(user_query)
-print(response)
+if __name__ == "__main__":
+    from logging_setup import setup_logging
+    setup_logging()
+    chatbot = Chatbot()
+    user_query = "How do I reset my password?"
+    response = chatbot.get_response(user_query)
+    print(response)
@@ -1,19 +1,27 @@
+import fcntl
 import json
 import threading
 import logging
 import os
+from contextlib import contextmanager
 
-FAQ_FILE = os.path.join(os.path.dirname(__file__), "../database/faq_data.json")
-
-# Logging setup
-logging.basicConfig(
-    filename="database.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+FAQ_FILE = os.path.join(os.path.dirname(__file__), "database", "faq_data.json")
+# Changes since the last compaction, one JSON operation per line
+OPS_FILE = os.path.join(os.path.dirname(__file__), "database", "faq_ops.jsonl")
+COMPACT_AFTER = 5000  # Logged operations before they are folded into FAQ_FILE
 
 class DatabaseConnection:
-    """A thread-safe, singleton JSON database manager."""
+    """
+    A thread-safe, singleton JSON database manager.
+
+    Every entry has a stable integer id. Writes are appended to OPS_FILE instead
+    of rewriting FAQ_FILE; the log is folded back into FAQ_FILE (compacted) once
+    it holds COMPACT_AFTER operations. Every process sharing the files tails the
+    log from its last offset (refresh), so writes made by one worker reach the
+    others; compaction swaps in a new log file, which tells them to reload.
+    Listeners are called after the locks are released, so slow listeners (such
+    as embedding new entries) never hold up other workers' reads and writes.
+    """
     _instance = None
     _lock = threading.Lock()
 
@@ -23,41 +31,285 @@ class DatabaseConnection:
             with cls._lock:
                 if cls._instance is None:
                     cls._instance = super(DatabaseConnection, cls).__new__(cls)
-                    cls._instance._load_data()
+                    cls._instance._listeners = []
+                    cls._instance._write_lock = threading.Lock()
+                    cls._instance._notify_lock = threading.Lock()
+                    cls._instance._changes = []  # (added, removed, local, position) changes waiting to reach listeners
+                    cls._instance.notified_position = None
+                    cls._instance.compactions = 0  # Compactions done by this process
+                    with cls._instance._file_lock():
+                        cls._instance._load_data()
         return cls._instance
 
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared by every process using OPS_FILE, held while reading or writing it."""
+        with open(OPS_FILE + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _locked(self):
+        """
+        Hold this process's write lock and the shared file lock. Changes queued
+        while they are held go to listeners once both are released; the notify
+        lock is taken first, so listeners still see changes in log order.
+        While a change is delivered, notified_position is the (source_stamp,
+        ops_offset, compactions) it brings listeners up to; the live values may
+        already be ahead of it.
+        """
+        self._write_lock.acquire()
+        try:
+            with self._file_lock():
+                yield
+        finally:
+            changes, self._changes = self._changes, []
+            self._notify_lock.acquire()
+            self._write_lock.release()
+            try:
+                for added, removed, local, position in changes:
+                    self.notified_position = position
+                    self._notify(added=added, removed=removed, local=local)
+            finally:
+                self._notify_lock.release()
+
     def _load_data(self):
-        """Load FAQ data from the JSON file."""
+        """Load FAQ data from the JSON file and replay the operations log."""
+        self.entries = {}
+        self.next_id = 0
+        self.pending_ops = 0
         try:
             if not os.path.exists(FAQ_FILE):
                 logging.warning("FAQ file missing, creating default file.")
-                self.faq_data = []
                 self._save_data()
             else:
                 with open(FAQ_FILE, "r", encoding="utf-8") as file:
-                    self.faq_data = json.load(file)
+                    # Files written before ids existed use list positions
+                    for position, entry in enumerate(json.load(file)):
+                        self._apply({"op": "add", "id": entry.get("id", position), **entry})
                 logging.info("FAQ data loaded successfully.")
         except (json.JSONDecodeError, FileNotFoundError) as e:
             logging.error(f"Failed to load FAQ data: {str(e)}")
-            self.faq_data = []
+            self.entries = {}
+
+        # Create the log up front so its inode, part of source_stamp, is stable from now on
+        open(OPS_FILE, "a").close()
+        self.ops_inode = os.stat(OPS_FILE).st_ino
+        self.ops_offset = 0  # Bytes of OPS_FILE applied so far
+        for op in self._read_new_ops():
+            self._apply(op)
+        logging.info(f"Replayed {self.pending_ops} FAQ operations.")
+
+    def _read_ops(self, start, stop=None):
+        """Parse the operations in OPS_FILE[start:stop]; returns (ops, offset after the last line read)."""
+        with open(OPS_FILE, "rb") as file:
+            file.seek(start)
+            data = file.read() if stop is None else file.read(stop - start)
+        ops = []
+        for line in data.splitlines(keepends=True):
+            start += len(line)
+            if not line.strip():
+                continue
+            try:
+                ops.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                # A crash mid-append can leave a torn line
+                logging.warning("Skipping unreadable FAQ operation.")
+        return ops, start
+
+    def _read_new_ops(self):
+        """Operations appended since ops_offset, or None if OPS_FILE was replaced by a compaction."""
+        if os.stat(OPS_FILE).st_ino != self.ops_inode:
+            return None
+        ops, self.ops_offset = self._read_ops(self.ops_offset)
+        self.pending_ops += len(ops)
+        return ops
+
+    def _apply(self, op):
+        """Apply one add/remove operation to the in-memory entries."""
+        if op["op"] == "add":
+            self.entries[op["id"]] = {"id": op["id"], "question": op["question"], "answer": op["answer"]}
+            self.next_id = max(self.next_id, op["id"] + 1)
+        elif op["op"] == "remove":
+            self.entries.pop(op["id"], None)
 
     def _save_data(self):
-        """Save FAQ data to the JSON file."""
+        """Save FAQ data to the JSON file; returns whether it succeeded."""
         try:
-            with open(FAQ_FILE, "w", encoding="utf-8") as file:
-                json.dump(self.faq_data, file, indent=4)
+            with open(FAQ_FILE + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(list(self.entries.values()), file, indent=4)
+            os.replace(FAQ_FILE + ".tmp", FAQ_FILE)
             logging.info("FAQ data saved successfully.")
+            return True
         except Exception as e:
             logging.error(f"Error saving FAQ data: {str(e)}")
+            return False
+
+    def _queue_change(self, added, removed, local=False):
+        """
+        Queue a change for listeners, with the log position it brings them up
+        to; local marks writes made by this process (caller holds both locks).
+        """
+        if added or removed:
+            position = (self.source_stamp(), self.ops_offset, self.compactions)
+            self._changes.append((added, removed, local, position))
+
+    def _catch_up(self):
+        """Apply operations other processes have logged since the last read and queue the change for listeners."""
+        ops = self._read_new_ops()
+        if ops is None:
+            before = dict(self.entries)
+            self._load_data()
+            touched = set(before) | set(self.entries)
+        else:
+            touched = {op["id"] for op in ops}
+            before = {entry_id: self.entries.get(entry_id) for entry_id in touched}
+            for op in ops:
+                self._apply(op)
+
+        # Changed entries are reported as removed and added again
+        removed = [entry_id for entry_id in touched
+                   if before.get(entry_id) is not None and self.entries.get(entry_id) != before[entry_id]]
+        added = [self.entries[entry_id] for entry_id in touched
+                 if entry_id in self.entries and self.entries[entry_id] != before.get(entry_id)]
+        self._queue_change(added, removed)
+        return bool(added or removed)
+
+    def refresh(self):
+        """Pick up FAQ writes made by other processes; returns whether anything changed."""
+        try:
+            stat = os.stat(OPS_FILE)
+        except OSError:
+            return False
+        if stat.st_ino == self.ops_inode and stat.st_size == self.ops_offset:
+            return False  # Nothing new; the common case costs one stat
+        try:
+            with self._locked():
+                return self._catch_up()
+        except Exception as e:
+            logging.error(f"Failed to refresh FAQ data: {str(e)}")
+            return False
+
+    def _append_ops(self, ops):
+        """Append operations to the log in one write, compacting when it grows too long (caller holds both locks)."""
+        if not ops:
+            return
+        lines = "".join(json.dumps(op) + "\n" for op in ops).encode("utf-8")
+        with open(OPS_FILE, "ab+") as file:
+            # Start on a fresh line if a crashed writer left a torn one
+            if file.tell():
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    lines = b"\n" + lines
+            file.write(lines)
+            self.ops_offset = file.tell()
+        for op in ops:
+            self._apply(op)
+        self.pending_ops += len(ops)
+        if self.pending_ops >= COMPACT_AFTER:
+            self._compact()
+
+    def _compact(self):
+        """Fold the operations log into FAQ_FILE and start a new, empty log."""
+        if not self._save_data():
+            return  # Keep the log; it is still the only record of these changes
+        # A new file rather than a truncation, so other processes see the inode change and reload
+        open(OPS_FILE + ".tmp", "w").close()
+        os.replace(OPS_FILE + ".tmp", OPS_FILE)
+        self.ops_inode = os.stat(OPS_FILE).st_ino
+        self.ops_offset = 0
+        self.pending_ops = 0
+        self.compactions += 1
+        logging.info("FAQ operations log compacted.")
+
+    def compact(self):
+        """Fold the operations log into FAQ_FILE now."""
+        with self._locked():
+            self._catch_up()
+            self._compact()
 
     def get_faq_data(self):
         """Return the loaded FAQ data."""
-        return self.faq_data
+        return list(self.entries.values())
+
+    @property
+    def faq_data(self):
+        return self.get_faq_data()
+
+    def source_stamp(self):
+        """
+        Identify the FAQ data a persisted index was built from: the size and
+        modification time of FAQ_FILE and the inode of the current operations
+        log. Appends keep the stamp; pair it with ops_offset and use
+        changes_since to catch up on them.
+        """
+        try:
+            stat = os.stat(FAQ_FILE)
+            stamp = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            stamp = [0, 0]
+        return stamp + [self.ops_inode]
+
+    def changes_since(self, offset):
+        """
+        Entries touched by operations logged after offset, as (removed_ids,
+        added_entries) against the current data, or None if offset is not in
+        the current log.
+        """
+        with self._locked():
+            if os.stat(OPS_FILE).st_ino != self.ops_inode or offset > self.ops_offset:
+                return None
+            ops, _ = self._read_ops(offset, self.ops_offset)
+        touched = list(dict.fromkeys(op["id"] for op in ops))
+        return touched, [self.entries[entry_id] for entry_id in touched if entry_id in self.entries]
+
+    def subscribe(self, callback):
+        """
+        Register callback(added_entries, removed_ids, local) to be called
+        whenever the FAQ data changes; local is True for writes made by this
+        process and False for ones picked up from other processes.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, added=(), removed=(), local=False):
+        for callback in list(self._listeners):
+            try:
+                callback(list(added), list(removed), local)
+            except Exception as e:
+                logging.error(f"FAQ change listener failed: {str(e)}")
+
+    def add_faq_entries(self, entries):
+        """Add many {"question", "answer"} entries with one log write; returns the new entries."""
+        with self._locked():
+            # Apply other workers' writes first so next_id is past their ids
+            self._catch_up()
+            ops = []
+            for entry in entries:
+                ops.append({"op": "add", "id": self.next_id + len(ops),
+                            "question": entry["question"], "answer": entry["answer"]})
+            self._append_ops(ops)
+            added = [self.entries[op["id"]] for op in ops]
+            self._queue_change(added, [], local=True)
+        return added
 
     def add_faq_entry(self, question, answer):
-        """Add a new FAQ entry and save it to the database."""
-        self.faq_data.append({"question": question, "answer": answer})
-        self._save_data()
+        """Add a new FAQ entry and save it to the database; returns its id."""
+        return self.add_faq_entries([{"question": question, "answer": answer}])[0]["id"]
+
+    def remove_faq_entries(self, ids):
+        """Remove entries by id; unknown ids are ignored."""
+        with self._locked():
+            self._catch_up()
+            ids = [entry_id for entry_id in ids if entry_id in self.entries]
+            self._append_ops([{"op": "remove", "id": entry_id} for entry_id in ids])
+            self._queue_change([], ids, local=True)
+
+    def remove_faq_entry(self, entry_id):
+        """Remove one entry by id."""
+        self.remove_faq_entries([entry_id])
 
 # Function to get FAQ data
 def get_faq_data():
@@ -0,0 +1,109 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+
+from metrics import REGISTRY
+from worker_slot import claim_slot
+
+LOG_FILE = os.getenv("LOG_FILE", "chatbot.log")  # Each process writes <name>.<slot><ext> next to it
+REQUEST_LOGGER = "chatbot.requests"  # High-volume per-request records, sampled
+
+# Record attributes that every LogRecord has; anything else came in through extra=
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line, including extra= fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of INFO and lower records from the request logger; warnings and errors always pass."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.name != REQUEST_LOGGER or record.levelno >= logging.WARNING:
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """A QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = REGISTRY.counter("chatbot_log_records_dropped_total", "Log records dropped on a full queue.")
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped.inc()
+
+
+def setup_logging(log_file=LOG_FILE, level=logging.INFO, max_bytes=10 * 2**20, backup_count=5,
+                  request_sample_rate=None, queue_size=10000):
+    """
+    Routes all logging through a bounded queue to a background thread that
+    writes JSON lines to a size-rotated file, so no request thread touches disk.
+    RotatingFileHandler cannot coordinate rotation across processes, so each
+    gunicorn worker writes its own file, named after a worker slot rather than
+    its pid: restarts reuse slots, so disk use stays within
+    workers * (backup_count + 1) * max_bytes however often workers restart.
+
+    request_sample_rate (0-1) is the share of REQUEST_LOGGER INFO records kept;
+    it defaults to the LOG_REQUEST_SAMPLE_RATE environment variable, else 1.
+    Safe to call more than once; only the first call configures logging.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        if request_sample_rate is None:
+            request_sample_rate = float(os.getenv("LOG_REQUEST_SAMPLE_RATE", 1.0))
+
+        root_name, ext = os.path.splitext(log_file)
+        slot = claim_slot(f"{root_name}.{{slot}}{ext}.lock")
+        file_handler = logging.handlers.RotatingFileHandler(
+            f"{root_name}.{slot}{ext}", maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonFormatter())
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        queue_handler = DroppingQueueHandler(log_queue)
+        # Sample before enqueueing so dropped request records cost almost nothing
+        queue_handler.addFilter(SamplingFilter(request_sample_rate))
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
@@ -0,0 +1,228 @@
+import bisect
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from worker_slot import claim_slot
+
+# Default latency buckets in seconds (upper bounds, Prometheus style)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Shared by every worker on the host, so each one's /metrics reports host-wide totals
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "chatbot_metrics"))
+MAX_WORKERS = int(os.getenv("METRICS_MAX_WORKERS", 64))
+
+
+def _label_text(labels, extra=""):
+    parts = [f'{key}="{value}"' for key, value in labels] + ([extra] if extra else [])
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value):
+    return int(value) if value.is_integer() else value
+
+
+class LocalValues:
+    """A metric's values, private to this process."""
+
+    def __init__(self, size):
+        self.size = size
+        self.row = [0.0] * size
+
+    def totals(self):
+        return list(self.row)
+
+
+class SharedValues:
+    """
+    A metric's values in a memory-mapped file with one row per worker slot.
+
+    Each process only adds to its own row, so updates need no cross-process
+    lock; totals() sums every row. A worker restarted into a slot carries on
+    from the row its predecessor left, so totals never go backwards.
+    """
+
+    def __init__(self, path, size, slot, max_workers):
+        self.size = size
+        nbytes = max_workers * size * 8
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < nbytes:
+                os.ftruncate(fd, nbytes)  # New bytes read as zeros
+            self._map = mmap.mmap(fd, nbytes)
+        finally:
+            os.close(fd)
+        self._values = memoryview(self._map).cast("d")
+        self.row = self._values[slot * size:(slot + 1) * size]
+
+    def totals(self):
+        return [sum(self._values[i::self.size]) for i in range(self.size)]
+
+
+class Counter:
+    """A thread-safe, monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=(), values=None):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = values or LocalValues(1)
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return _number(self.values.totals()[0])
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.values.row[0] += amount
+
+    def render(self):
+        return [f"{self.name}{_label_text(self.labels)} {self.value}"]
+
+
+class Histogram:
+    """A thread-safe histogram with fixed cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, labels=(), values=None):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # One count per bucket, the last one +Inf, then the sum of observations
+        self.values = values or LocalValues(self.size(self.buckets))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def size(buckets):
+        return len(buckets) + 2
+
+    def observe(self, value):
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.values.row[slot] += 1
+            self.values.row[-1] += value
+
+    @contextmanager
+    def time(self):
+        """Observes the wall time of the with-block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self):
+        lines = []
+        *counts, total = self.values.totals()
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            bucket_labels = _label_text(self.labels, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {_number(cumulative)}")
+        lines.append(f"{self.name}_sum{_label_text(self.labels)} {total}")
+        lines.append(f"{self.name}_count{_label_text(self.labels)} {_number(cumulative)}")
+        return lines
+
+
+class Registry:
+    """
+    Holds every metric of the process and renders them in Prometheus text format.
+
+    With a directory, metric values are kept there in files shared by every
+    worker on the host (see SharedValues), so any worker's render() reports
+    the totals of all of them and scrapes no longer depend on which worker
+    answers. Workers beyond max_workers, or a directory that cannot be used,
+    fall back to values of their own.
+    """
+
+    def __init__(self, directory=None, max_workers=MAX_WORKERS):
+        self.directory = directory
+        self.max_workers = max_workers
+        self._slot = None
+        self._metrics = {}
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _claim_slot(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._slot = claim_slot(os.path.join(self.directory, "worker.{slot}.lock"), self.max_workers)
+        except OSError as e:
+            logging.warning(f"Shared metrics unavailable, reporting this worker only: {str(e)}")
+        if self._slot is None:
+            self.directory = None
+
+    def _values(self, name, labels, size):
+        """Storage for one metric (caller holds the lock)."""
+        if self.directory is not None and self._slot is None:
+            self._claim_slot()
+        if self.directory is None:
+            return LocalValues(size)
+        # The layout is part of the file name, so a changed metric never reads old rows
+        digest = hashlib.blake2b(repr((labels, size, self.max_workers)).encode("utf-8"), digest_size=8).hexdigest()
+        return SharedValues(os.path.join(self.directory, f"{name}.{digest}.bin"), size, self._slot, self.max_workers)
+
+    def _after_fork(self):
+        """A forked child must not add to its parent's rows; move every metric to a slot of its own."""
+        self._lock = threading.Lock()
+        if self._slot is None:
+            return
+        self._slot = None
+        for (name, labels), metric in self._metrics.items():
+            metric._lock = threading.Lock()
+            metric.values = self._values(name, labels, metric.values.size)
+
+    def _get_or_create(self, cls, name, help_text, labels, size, **kwargs):
+        labels = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            if (name, labels) not in self._metrics:
+                values = self._values(name, labels, size)
+                self._metrics[(name, labels)] = cls(name, help_text, labels=labels, values=values, **kwargs)
+            return self._metrics[(name, labels)]
+
+    def counter(self, name, help_text, labels=None):
+        """Returns the counter called name with these labels, creating it on first use."""
+        return self._get_or_create(Counter, name, help_text, labels, 1)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, labels=None):
+        """Returns the histogram called name with these labels, creating it on first use."""
+        return self._get_or_create(Histogram, name, help_text, labels, Histogram.size(buckets), buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        # Keep every label set of a name together, in order of first registration
+        first_seen = {}
+        for position, metric in enumerate(metrics):
+            first_seen.setdefault(metric.name, position)
+        metrics.sort(key=lambda metric: first_seen[metric.name])
+        lines, described = [], set()
+        for metric in metrics:
+            # HELP/TYPE once per name, however many label sets it has
+            if metric.name not in described:
+                described.add(metric.name)
+                lines.append(f"# HELP {metric.name} {metric.help_text}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(METRICS_DIR)
+
+
+def stage_histogram(stage):
+    """Latency histogram for one stage of handling a chat (parse, exact, cache, embed, search, serialize)."""
+    return REGISTRY.histogram(
+        "chatbot_stage_seconds", "Time spent per stage of handling a chat request.", labels={"stage": stage}
+    )
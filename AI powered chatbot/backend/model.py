@@ -1,22 +1,48 @@
-import spacy
+import importlib
 import logging
-import faiss
+import json
+import os
+import threading
 import numpy as np
 
-# Logging setup
-logging.basicConfig(
-    filename="nlp.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+class LazyModule:
+    """Imports a heavy module on first attribute access instead of at import time."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+spacy = LazyModule("spacy")
+faiss = LazyModule("faiss")
+
+INDEX_DIR = os.path.join(os.path.dirname(__file__), "database", "index")
+INDEX_FILE = "faq.index"
+QUESTIONS_FILE = "faq_questions.json"
+# Stored with the index so one built for a different metric or layout is rebuilt, not misread
+INDEX_METRIC = "cosine"
+INDEX_VERSION = 2  # 2: vectors are keyed by FAQ entry id (IndexIDMap2)
+
+# Pipeline components each task needs; everything else is disabled for that call.
+# Document vectors come from the static word vectors, so embedding needs none.
+VECTOR_PIPES = ()
+LEMMA_PIPES = ("tok2vec", "tagger", "attribute_ruler", "lemmatizer")
+ENTITY_PIPES = ("tok2vec", "ner")
 
 class NLPModel:
     """Advanced NLP Model for text preprocessing and keyword extraction."""
     
     _nlp = None  # Lazy loading of the NLP model
 
-    def __init__(self, model_name="en_core_web_md"):
-        """Load the spaCy model only when required."""
+    def __init__(self, model_name="en_core_web_md", batch_size=256, n_process=1):
+        """Load the spaCy model only when required.
+
+        batch_size and n_process are the nlp.pipe defaults for every batch call.
+        """
         if NLPModel._nlp is None:
             try:
                 NLPModel._nlp = spacy.load(model_name)
@@ -26,27 +52,76 @@ class NLPModel:
                 raise
 
         self.nlp = NLPModel._nlp
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.n_process = n_process
         self.custom_stopwords = set()  # Allows adding/removing stopwords dynamically
         self.index = None
+        self.index_read_only = False  # True while the index is memory-mapped from disk
+        self.index_lock = threading.Lock()
+        self.ops_offset = 0  # Offset in the FAQ operations log the loaded index is current to
         self.faq_embeddings = []
-        self.faq_questions = []
+        self.faq_questions = []  # Indexed by FAQ entry id; None for removed ids
+
+    def _pipe(self, texts, needed, batch_size=None, n_process=None):
+        """Streams texts through nlp.pipe with only the needed components enabled."""
+        disable = [name for name in self.nlp.pipe_names if name not in needed]
+        return self.nlp.pipe(
+            texts,
+            disable=disable,
+            batch_size=batch_size or self.batch_size,
+            n_process=n_process or self.n_process,
+        )
+
+    def embed(self, texts, batch_size=None, n_process=None, normalize=False):
+        """Embeds texts into a float32 (len(texts), dim) matrix of document vectors.
+
+        With normalize=True every row is scaled to unit length (all-zero rows for
+        out-of-vocabulary text stay zero), so inner products are cosine similarities.
+        """
+        vectors = np.zeros((len(texts), self.nlp.vocab.vectors_length), dtype=np.float32)
+        for i, doc in enumerate(self._pipe(texts, VECTOR_PIPES, batch_size, n_process)):
+            vectors[i] = doc.vector
+        if normalize and len(vectors):
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def preprocess_batch(self, texts, batch_size=None, n_process=None):
+        """Batch version of preprocess."""
+        texts = [text.lower().strip() for text in texts]
+        return [
+            " ".join([token.lemma_ for token in doc if token.is_alpha and token.text not in self.custom_stopwords])
+            for doc in self._pipe(texts, LEMMA_PIPES, batch_size, n_process)
+        ]
+
+    def extract_keywords_batch(self, texts, top_n=5, batch_size=None, n_process=None):
+        """Batch version of extract_keywords."""
+        texts = [text.lower() for text in texts]
+        results = []
+        for doc in self._pipe(texts, LEMMA_PIPES, batch_size, n_process):
+            keywords = [token.lemma_ for token in doc if token.is_alpha and not token.is_stop]
+            results.append(list(set(keywords))[:top_n])  # Return top N unique keywords
+        return results
+
+    def extract_entities_batch(self, texts, batch_size=None, n_process=None):
+        """Batch version of extract_entities."""
+        results = []
+        for doc in self._pipe(texts, ENTITY_PIPES, batch_size, n_process):
+            entities = {ent.label_: ent.text for ent in doc.ents}
+            results.append(entities if entities else "No entities found.")
+        return results
 
     def preprocess(self, text):
         """Preprocess text: lowercasing, lemmatization, and stopword removal."""
-        doc = self.nlp(text.lower().strip())
-        return " ".join([token.lemma_ for token in doc if token.is_alpha and token.text not in self.custom_stopwords])
+        return self.preprocess_batch([text])[0]
 
     def extract_keywords(self, text, top_n=5):
         """Extracts important keywords from the text."""
-        doc = self.nlp(text.lower())
-        keywords = [token.lemma_ for token in doc if token.is_alpha and not token.is_stop]
-        return list(set(keywords))[:top_n]  # Return top N unique keywords
+        return self.extract_keywords_batch([text], top_n)[0]
 
     def extract_entities(self, text):
         """Extract named entities like names, dates, organizations, etc."""
-        doc = self.nlp(text)
-        entities = {ent.label_: ent.text for ent in doc.ents}
-        return entities if entities else "No entities found."
+        return self.extract_entities_batch([text])[0]
 
     def add_stopwords(self, words):
         """Dynamically add custom stopwords."""
@@ -57,20 +132,168 @@ class NLPModel:
         self.custom_stopwords.difference_update(words)
 
     def build_faiss_index(self, faq_data):
-        """Builds FAISS index for semantic search."""
-        self.faq_questions = [entry["question"] for entry in faq_data]
-        self.faq_embeddings = [self.nlp(q).vector for q in self.faq_questions]
+        """Builds an inner-product FAISS index over unit vectors (cosine similarity), keyed by entry id."""
+        ids = np.array([entry.get("id", position) for position, entry in enumerate(faq_data)], dtype=np.int64)
+        questions = [entry["question"] for entry in faq_data]
+        self.faq_embeddings = self.embed(questions, normalize=True)
+
+        self.faq_questions = [None] * (int(ids.max()) + 1 if len(ids) else 0)
+        for entry_id, question in zip(ids, questions):
+            self.faq_questions[entry_id] = question
+
+        with self.index_lock:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.nlp.vocab.vectors_length))
+            self.index_read_only = False
+            if len(ids):
+                self.index.add_with_ids(self.faq_embeddings, ids)
+        logging.info("FAISS index built successfully.")
+
+    def _writable_index(self):
+        """Copies a memory-mapped index into memory before its first update (caller holds index_lock)."""
+        if self.index is None:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.nlp.vocab.vectors_length))
+        elif self.index_read_only:
+            # clone_index cannot copy a memory-mapped index, so rebuild it from its vectors and ids
+            flat = faiss.downcast_index(self.index.index)
+            index = faiss.IndexIDMap2(faiss.IndexFlatIP(flat.d))
+            if self.index.ntotal:
+                index.add_with_ids(flat.reconstruct_n(0, self.index.ntotal), faiss.vector_to_array(self.index.id_map))
+            self.index = index
+            self.index_read_only = False
+        return self.index
+
+    def add_entries(self, entries):
+        """Embeds and indexes new FAQ entries ({"id", "question"}) in place, without a rebuild."""
+        if not entries:
+            return
+        ids = np.array([entry["id"] for entry in entries], dtype=np.int64)
+        questions = [entry["question"] for entry in entries]
+        vectors = self.embed(questions, normalize=True)
 
-        if self.faq_embeddings:
-            self.index = faiss.IndexFlatL2(len(self.faq_embeddings[0]))
-            self.index.add(np.array(self.faq_embeddings))
-            logging.info("FAISS index built successfully.")
+        with self.index_lock:
+            index = self._writable_index()
+            index.remove_ids(ids)  # Re-adding an id replaces its vector
+            index.add_with_ids(vectors, ids)
+            if int(ids.max()) >= len(self.faq_questions):
+                self.faq_questions.extend([None] * (int(ids.max()) + 1 - len(self.faq_questions)))
+            for entry_id, question in zip(ids, questions):
+                self.faq_questions[entry_id] = question
+        logging.info(f"Added {len(ids)} entries to the FAISS index.")
+
+    def remove_ids(self, ids):
+        """Drops FAQ entries from the index by id."""
+        if not len(ids) or self.index is None:
+            return
+        with self.index_lock:
+            removed = self._writable_index().remove_ids(np.asarray(ids, dtype=np.int64))
+            for entry_id in ids:
+                if entry_id < len(self.faq_questions):
+                    self.faq_questions[entry_id] = None
+        logging.info(f"Removed {removed} entries from the FAISS index.")
+
+    def search(self, queries, k=5):
+        """
+        Runs one batched cosine search for the queries.
+
+        Returns (scores, ids) arrays of shape (len(queries), k), best first.
+        Scores are cosine similarities clipped to [0, 1]; ids are FAQ positions,
+        -1 where the index holds fewer than k entries.
+        """
+        if self.index is None or not queries:
+            return np.zeros((len(queries), k), dtype=np.float32), np.full((len(queries), k), -1, dtype=np.int64)
+        return self.search_vectors(self.embed(queries, normalize=True), k)
+
+    def search_vectors(self, vectors, k=5):
+        """Same as search, for queries already embedded with embed(..., normalize=True)."""
+        if self.index is None or not len(vectors):
+            return np.zeros((len(vectors), k), dtype=np.float32), np.full((len(vectors), k), -1, dtype=np.int64)
+
+        with self.index_lock:
+            scores, ids = self.index.search(np.ascontiguousarray(vectors, dtype=np.float32), k)
+        return np.clip(scores, 0.0, 1.0), ids
+
+    def find_similar_questions(self, queries, k=1):
+        """Finds the k most similar FAQ questions for every query with one batched search.
+
+        Returns a list per query of (question, score) pairs, most similar first.
+        """
+        scores, ids = self.search(queries, k)
+        return [
+            [(self.faq_questions[i], float(score)) for i, score in zip(row_ids, row_scores) if i >= 0]
+            for row_ids, row_scores in zip(ids, scores)
+        ]
 
     def find_similar_question(self, query):
         """Finds the most similar FAQ question using FAISS."""
-        if self.index is None:
+        matches = self.find_similar_questions([query])[0]
+        if not matches:
             return None, 0
+        return matches[0]  # Return the closest question and its score
+
+    def save_index(self, index_dir=None, source_stamp=None, ops_offset=0):
+        """
+        Persists the FAISS index and its question list so workers can skip embedding.
+
+        ops_offset is how far into the FAQ operations log the index is current;
+        a worker loading it replays only the operations after that offset.
+        """
+        if self.index is None:
+            logging.warning("No FAISS index to save.")
+            return
+
+        index_dir = index_dir or INDEX_DIR
+        os.makedirs(index_dir, exist_ok=True)
+        # Write then rename so a starting worker never reads a half-written file; the tmp
+        # names are per process because every worker that starts on a stale index saves one
+        tmp_suffix = f".{os.getpid()}.tmp"
+        index_path = os.path.join(index_dir, INDEX_FILE)
+        with self.index_lock:
+            faiss.write_index(self.index, index_path + tmp_suffix)
+        os.replace(index_path + tmp_suffix, index_path)
+
+        questions_path = os.path.join(index_dir, QUESTIONS_FILE)
+        with open(questions_path + tmp_suffix, "w", encoding="utf-8") as file:
+            json.dump({
+                "model": self.model_name,
+                "metric": INDEX_METRIC,
+                "version": INDEX_VERSION,
+                "source_stamp": source_stamp,
+                "ops_offset": ops_offset,
+                "questions": self.faq_questions,
+            }, file)
+        os.replace(questions_path + tmp_suffix, questions_path)
+        logging.info(f"FAISS index saved to {index_dir}.")
+
+    def load_index(self, index_dir=None, source_stamp=None, mmap=True):
+        """
+        Loads a persisted FAISS index; returns False if it is missing or stale.
+
+        With mmap=True the index is memory-mapped read-only, so every worker on
+        the host shares the same pages instead of holding its own copy.
+        """
+        index_dir = index_dir or INDEX_DIR
+        index_path = os.path.join(index_dir, INDEX_FILE)
+        questions_path = os.path.join(index_dir, QUESTIONS_FILE)
+        if not os.path.exists(index_path) or not os.path.exists(questions_path):
+            return False
+
+        try:
+            with open(questions_path, "r", encoding="utf-8") as file:
+                metadata = json.load(file)
+            if (metadata.get("model") != self.model_name or metadata.get("metric") != INDEX_METRIC
+                    or metadata.get("version") != INDEX_VERSION or metadata.get("source_stamp") != source_stamp):
+                logging.info("Persisted FAISS index is stale, rebuilding.")
+                return False
 
-        query_vector = np.array([self.nlp(query).vector])
-        D, I = self.index.search(query_vector, 1)  # Find the closest match
-        return self.faq_questions[I[0][0]], D[0][0]  # Return the closest question and its score
+            # IO_FLAG_MMAP only maps IVF inverted lists; MMAP_IFC maps the flat vectors as well
+            flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if mmap else 0
+            self.index = faiss.read_index(index_path, flags)
+            self.index_read_only = mmap
+            self.faq_questions = metadata["questions"]
+            self.ops_offset = metadata.get("ops_offset", 0)
+            self.faq_embeddings = []
+            logging.info(f"FAISS index loaded from {index_dir} ({self.index.ntotal} entries).")
+            return True
+        except Exception as e:
+            logging.error(f"Error loading FAISS index: {str(e)}")
+            return False
@@ -0,0 +1,127 @@
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+SHM_FILE = os.path.join(tempfile.gettempdir(), "chatbot_ratelimit.bin")
+
+# Atomic refill-and-take on one Redis hash, so every worker shares the same bucket.
+# KEYS[1] bucket key; ARGV rate (tokens/s), capacity. Returns {allowed, retry_after_ms}.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, retry_after}
+"""
+
+
+class RedisTokenBucket:
+    """Token bucket per key, kept in Redis and updated by one Lua call per request."""
+
+    def __init__(self, client, rate, capacity, prefix="chatbot:ratelimit"):
+        self.client = client
+        self.rate = rate
+        self.capacity = capacity
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+
+    def allow(self, key):
+        """Takes one token for key; returns (allowed, seconds until a token is available)."""
+        allowed, retry_after_ms = self._script(keys=[f"{self.prefix}:{key}"], args=[self.rate, self.capacity])
+        return bool(allowed), int(retry_after_ms) / 1000
+
+
+class SharedMemoryTokenBucket:
+    """
+    Token buckets in a memory-mapped file shared by every worker on the host.
+
+    Keys hash into a fixed table of slots, each holding (tokens, last refill
+    time) and guarded by an fcntl byte-range lock, so processes forked or
+    started separately all enforce the same limit. fcntl locks belong to the
+    process, so a thread lock also serialises the request threads of one worker. Two keys that hash to the
+    same slot share a bucket, so slots should comfortably exceed active clients.
+    """
+
+    SLOT = struct.Struct("dd")  # tokens, timestamp
+
+    def __init__(self, rate, capacity, path=SHM_FILE, slots=65536):
+        self.rate = rate
+        self.capacity = capacity
+        self.slots = slots
+        size = slots * self.SLOT.size
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)  # New bytes read as zeros = empty, never-used slots
+        self._map = mmap.mmap(self._fd, size)
+        self._thread_lock = threading.Lock()
+
+    def _slot(self, key):
+        digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.slots * self.SLOT.size
+
+    def allow(self, key):
+        """Takes one token for key; returns (allowed, seconds until a token is available)."""
+        offset = self._slot(key)
+        with self._thread_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.SLOT.size, offset)
+            try:
+                tokens, ts = self.SLOT.unpack_from(self._map, offset)
+                now = time.time()
+                if ts == 0:
+                    tokens = self.capacity
+                else:
+                    tokens = min(self.capacity, tokens + max(0.0, now - ts) * self.rate)
+
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                self.SLOT.pack_into(self._map, offset, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.SLOT.size, offset)
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+
+class RateLimiter:
+    """Uses the Redis bucket when Redis is available and the shared-memory bucket otherwise."""
+
+    def __init__(self, rate, capacity, redis_client=None, path=SHM_FILE):
+        """rate is tokens per second, capacity the burst size."""
+        self.rate = rate
+        self.capacity = capacity
+        self.local = SharedMemoryTokenBucket(rate, capacity, path=path)
+        self.redis = None
+        if redis_client is not None:
+            self.attach_redis(redis_client)
+
+    def attach_redis(self, redis_client):
+        """Switches to the shared Redis bucket, e.g. once startup has connected to Redis."""
+        self.redis = RedisTokenBucket(redis_client, self.rate, self.capacity)
+
+    def allow(self, key):
+        if self.redis is not None:
+            try:
+                return self.redis.allow(key)
+            except Exception as e:
+                logging.warning(f"Redis rate limit check failed, using shared memory: {str(e)}")
+        return self.local.allow(key)
@@ -0,0 +1,26 @@
+import fcntl
+
+_held = []  # Lock files stay open, and so locked, for the life of the process
+
+
+def claim_slot(lock_path, limit=None):
+    """
+    Returns the lowest worker slot no live process holds, or None if all
+    limit slots are taken.
+
+    lock_path is a template such as "chatbot.{slot}.log.lock"; the slot's lock
+    file is flocked until this process exits, so a restarted worker takes
+    over the slot, and any per-slot files, of the one it replaced.
+    """
+    slot = 0
+    while limit is None or slot < limit:
+        lock_file = open(lock_path.format(slot=slot), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            slot += 1
+            continue
+        _held.append(lock_file)
+        return slot
+    return None
@@ -23,6 +23,10 @@ CURRENCIES = ["USD:United States Dollar 🇺🇸",
     "THB: Thai Baht 🇹🇭",
     "RUB: Russian Ruble 🇷🇺"]
 
+# "USD:United States Dollar 🇺🇸" -> "USD"
+def currency_code(currency):
+    return currency.split(":")[0].strip()
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     converted_value = None
@@ -30,8 +34,8 @@ def index():
     rates = {}
 
     if request.method == "POST":
-        base_currency = request.form.get("base_currency")
-        target_currency = request.form.get("target_currency")
+        base_currency = currency_code(request.form.get("base_currency"))
+        target_currency = currency_code(request.form.get("target_currency"))
         amount = float(request.form.get("amount"))
         future_days = int(request.form.get("future_days", 7))
 
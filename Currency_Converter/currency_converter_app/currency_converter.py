@@ -1,21 +1,24 @@
 import pandas as pd
 import numpy as np
 import os
+import threading
 from sklearn.linear_model import LinearRegression
-import requests
+from rate_providers import RateCache, get_provider
 
 CSV_FILE = "exchange_rates.csv"
 
+# Rate tables are cached per base currency (RATE_CACHE_TTL seconds) and any pair is
+# derived from one cached table, so most conversions need no network call
+rate_cache = RateCache(
+    get_provider(),
+    ttl=float(os.getenv("RATE_CACHE_TTL", 3600)),
+    store_path="rates_store.json",
+    retry_ttl=float(os.getenv("RATE_RETRY_TTL", 60)),
+)
+
 # Fetch live exchange rates from API
 def fetch_exchange_rates(base_currency="USD", target_currency="INR"):
-    url = f"https://api.exchangerate-api.com/v4/latest/{base_currency}"
-    response = requests.get(url)
-    data = response.json()
-    rates = data["rates"]
-    
-    if target_currency in rates:
-        return rates[target_currency]
-    return None
+    return rate_cache.get_rate(base_currency, target_currency)
 
 # Generate sample historical exchange rate data
 def create_sample_data(base_currency="USD", target_currency="INR"):
@@ -25,33 +28,76 @@ def create_sample_data(base_currency="USD", target_currency="INR"):
     df.to_csv(CSV_FILE, index=False)
     print(f"Created {CSV_FILE} with sample data.")
 
+EPOCH_ORDINAL = pd.Timestamp("1970-01-01").toordinal()
+
+# Loads the historical CSV once per change and keeps one fitted model per currency pair
+class ModelRegistry:
+    def __init__(self, csv_file=CSV_FILE):
+        self.csv_file = csv_file
+        self.stamp = None
+        self.pairs = {}   # (base, target) -> (ordinal dates, rates), sorted by date
+        self.models = {}  # (base, target) -> (model, last ordinal date)
+        self.lock = threading.Lock()
+
+    # Re-reads the CSV only when its modification time or size changes
+    def _refresh(self, base_currency, target_currency):
+        if not os.path.exists(self.csv_file):
+            create_sample_data(base_currency, target_currency)
+
+        stat = os.stat(self.csv_file)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self.stamp:
+            return
+
+        df = pd.read_csv(self.csv_file, parse_dates=["Date"])
+        # Vectorised date -> ordinal (days since 0001-01-01, as Timestamp.toordinal)
+        df["Date"] = df["Date"].values.astype("datetime64[D]").astype(np.int64) + EPOCH_ORDINAL
+        df = df.sort_values("Date", kind="stable")
+
+        self.pairs = {
+            pair: (group["Date"].to_numpy(), group["Rate"].to_numpy(dtype=float))
+            for pair, group in df.groupby(["Base_Currency", "Target_Currency"])
+        }
+        self.models = {}
+        self.stamp = stamp
+
+    # Historical (dates, rates) for a pair; empty arrays if the CSV has none
+    def history(self, base_currency="USD", target_currency="INR"):
+        with self.lock:
+            self._refresh(base_currency, target_currency)
+            return self.pairs.get((base_currency, target_currency), (np.empty(0, dtype=np.int64), np.empty(0)))
+
+    # Fitted model and last known date for a pair, or (None, None) without history
+    def get(self, base_currency="USD", target_currency="INR"):
+        with self.lock:
+            self._refresh(base_currency, target_currency)
+            pair = (base_currency, target_currency)
+            if pair not in self.models:
+                dates, rates = self.pairs.get(pair, (np.empty(0), np.empty(0)))
+                if not len(dates):
+                    return None, None
+                model = LinearRegression()
+                model.fit(dates.reshape(-1, 1), rates)
+                self.models[pair] = (model, dates[-1])
+            return self.models[pair]
+
+registry = ModelRegistry()
+
 # Load historical data for the selected currency pair
 def load_data(base_currency="USD", target_currency="INR"):
-    if not os.path.exists(CSV_FILE):
-        create_sample_data(base_currency, target_currency)
-    
-    df = pd.read_csv(CSV_FILE)
-    df["Date"] = pd.to_datetime(df["Date"]).map(pd.Timestamp.toordinal)
-    
-    # Filter data for selected currencies
-    df = df[(df["Base_Currency"] == base_currency) & (df["Target_Currency"] == target_currency)]
-    
-    return df
+    dates, rates = registry.history(base_currency, target_currency)
+    return pd.DataFrame({"Date": dates, "Base_Currency": base_currency, "Target_Currency": target_currency, "Rate": rates})
 
 # Train Linear Regression model
 def train_model(base_currency="USD", target_currency="INR"):
-    df = load_data(base_currency, target_currency)
-    X = df["Date"].values.reshape(-1, 1)
-    y = df["Rate"].values
-    model = LinearRegression()
-    model.fit(X, y)
-    return model
+    return registry.get(base_currency, target_currency)[0]
 
 # Predict future exchange rates for selected currency pair
 def predict_exchange_rate(base_currency="USD", target_currency="INR", future_days=7):
-    model = train_model(base_currency, target_currency)
-    last_date = load_data(base_currency, target_currency)["Date"].max()
-    future_dates = np.array([last_date + i for i in range(1, future_days + 1)]).reshape(-1, 1)
+    model, last_date = registry.get(base_currency, target_currency)
+    if model is None:
+        return None  # No history for this pair
+    future_dates = np.arange(last_date + 1, last_date + future_days + 1).reshape(-1, 1)
     predictions = model.predict(future_dates)
     
     # Format output
@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = "https://api.exchangerate-api.com/v4/latest/{base}"
+RATES_STORE = "rates_store.json"  # Last downloaded rate table, used when the API is unreachable
+
+# Offline snapshot of USD rates for the currencies offered in the UI
+MOCK_USD_RATES = {
+    "USD": 1.0, "EUR": 0.92, "INR": 83.2, "GBP": 0.79, "JPY": 150.0, "CAD": 1.36,
+    "AUD": 1.52, "CNY": 7.23, "CHF": 0.88, "SGD": 1.34, "ZAR": 18.6, "BRL": 5.0,
+    "MXN": 17.1, "HKD": 7.82, "KRW": 1330.0, "NZD": 1.64, "THB": 35.9, "RUB": 91.5,
+}
+
+
+# Turns a table quoted against one currency into a table quoted against base
+def rebase(table_base, rates, base):
+    if base == table_base:
+        return dict(rates)
+    if base not in rates:
+        return None
+    return {currency: rate / rates[base] for currency, rate in rates.items()}
+
+
+# Downloads rate tables from exchangerate-api.com over one pooled, keep-alive session
+class APIRateProvider:
+    def __init__(self, url=API_URL, timeout=5.0, pool_size=10):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get_rates(self, base):
+        response = self.session.get(self.url.format(base=base), timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("base", base), data["rates"]
+
+
+# Reads a rate table saved in the API's {"base": ..., "rates": {...}} format
+class FileRateProvider:
+    def __init__(self, path=RATES_STORE):
+        self.path = path
+
+    def get_rates(self, base):
+        with open(self.path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        return data["base"], data["rates"]
+
+
+# Serves fixed rates, for offline use and tests
+class MockRateProvider:
+    def __init__(self, rates=None, base="USD"):
+        self.base = base
+        self.rates = rates or MOCK_USD_RATES
+
+    def get_rates(self, base):
+        return self.base, self.rates
+
+
+# Caches rate tables per base currency and derives cross rates from whatever is cached.
+# Tables downloaded from the API are persisted to store_path and served from it when a
+# download fails; those stored tables are only trusted for retry_ttl before trying again.
+class RateCache:
+    def __init__(self, provider, ttl=3600, store_path=None, retry_ttl=60):
+        self.provider = provider
+        self.ttl = ttl
+        self.retry_ttl = min(retry_ttl, ttl)
+        self.store_path = store_path
+        self.tables = {}  # base -> (fetched_at, rates)
+        self.lock = threading.Lock()
+
+    def _fresh_tables(self):
+        now = time.monotonic()
+        return {base: rates for base, (fetched_at, rates) in self.tables.items() if now - fetched_at < self.ttl}
+
+    def _save(self, base, rates):
+        tmp_path = self.store_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"base": base, "rates": rates}, file)
+        os.replace(tmp_path, self.store_path)
+
+    def _fetch(self, base):
+        try:
+            table_base, rates = self.provider.get_rates(base)
+            fetched_at = time.monotonic()
+            # Only live downloads are persisted; mock or file tables would overwrite real rates
+            if self.store_path and isinstance(self.provider, APIRateProvider):
+                self._save(table_base, rates)
+        except (requests.RequestException, OSError, ValueError, KeyError) as e:
+            if not self.store_path or not os.path.exists(self.store_path):
+                print(f"❌ Error fetching exchange rates: {e}")
+                return None
+            print(f"⚠️ Using stored exchange rates, fetch failed: {e}")
+            table_base, rates = FileRateProvider(self.store_path).get_rates(base)
+            # Expire after retry_ttl rather than ttl, so the API is tried again soon
+            fetched_at = time.monotonic() - self.ttl + self.retry_ttl
+
+        self.tables[table_base] = (fetched_at, rates)
+        return rebase(table_base, rates, base)
+
+    # Rate table quoted against base, fetched only if no cached table covers it
+    def get_rates(self, base):
+        with self.lock:
+            tables = self._fresh_tables()
+            if base in tables:
+                return tables[base]
+            for table_base, rates in tables.items():
+                rebased = rebase(table_base, rates, base)
+                if rebased is not None:
+                    return rebased
+            return self._fetch(base)
+
+    def get_rate(self, base, target):
+        if base == target:
+            return 1.0
+        rates = self.get_rates(base)
+        if rates is None:
+            return None
+        return rates.get(target)
+
+    def clear(self):
+        with self.lock:
+            self.tables.clear()
+
+
+# Picks the provider from RATE_PROVIDER: "api" (default), "file" (RATES_FILE) or "mock"
+def get_provider():
+    name = os.getenv("RATE_PROVIDER", "api").lower()
+    if name == "file":
+        return FileRateProvider(os.getenv("RATES_FILE", RATES_STORE))
+    if name == "mock":
+        return MockRateProvider()
+    return APIRateProvider(timeout=float(os.getenv("RATE_API_TIMEOUT", 5.0)))
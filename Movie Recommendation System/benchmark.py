@@ -0,0 +1,248 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.content import build_hybrid_similarity
+from src.data_loader import load_data
+from src.factorization import build_factor_index
+from src.recommender import recommend_for_user, recommend_for_users, top_k_similar
+from src.similarity import MovieNeighbors, build_movie_similarity, build_user_similarity, compute_movie_similarity, top_k_rows
+from src.title_search import TitleIndex
+
+RELEVANT_RATING = 4.0
+# Common searches that must keep returning hits however large the catalogue grows
+TITLE_QUERIES = ["star wars", "lord of the rings", "the godfather", "toy story", "harry potter", "the", "love"]
+
+
+def split_ratings(ratings, test_fraction=0.2):
+    """Holds out the latest test_fraction of every user's ratings."""
+    position = ratings.groupby("userId")["timestamp"].rank(method="first", pct=True)
+    is_test = position > 1 - test_fraction
+    return ratings[~is_test], ratings[is_test]
+
+
+def scale_ratings(ratings, factor, seed=0):
+    """Replicates the user base factor times under new userIds with jittered ratings."""
+    if factor <= 1:
+        return ratings
+
+    rng = np.random.default_rng(seed)
+    id_offset = int(ratings["userId"].max()) + 1
+    copies = []
+    for copy in range(factor):
+        chunk = ratings.copy()
+        chunk["userId"] = chunk["userId"] + copy * id_offset
+        if copy:
+            jitter = rng.choice(np.array([-0.5, 0, 0.5], dtype=np.float32), len(chunk))
+            chunk["rating"] = np.clip(chunk["rating"] + jitter, 0.5, 5.0)
+        copies.append(chunk)
+    return pd.concat(copies, ignore_index=True)
+
+
+def scale_titles(movies, n_titles, seed=0):
+    """Samples n_titles titles from the catalogue, prefixing every other one with a random title word."""
+    rng = np.random.default_rng(seed)
+    words = np.array(sorted({word for title in movies["title"] for word in title.split()[:-1] if word.isalpha()}))
+    base = movies["title"].to_numpy()[rng.integers(len(movies), size=n_titles)]
+    extra = words[rng.integers(len(words), size=n_titles)]
+    titles = [f"{word} {title}" if i % 2 else title for i, (title, word) in enumerate(zip(base, extra))]
+    return pd.DataFrame({"movieId": np.arange(n_titles), "title": titles})
+
+
+def check_title_search(movies, n_titles, queries=TITLE_QUERIES):
+    """
+    Builds a TitleIndex over n_titles titles and checks that common queries
+    still return hits; returns their p50/p99 latency in milliseconds.
+    """
+    catalogue = scale_titles(movies, n_titles) if n_titles > len(movies) else movies
+    start = time.perf_counter()
+    index = TitleIndex(catalogue)
+    print(f"🔎 Title index over {len(catalogue)} titles built in {time.perf_counter() - start:.1f}s")
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        results = index.search(query)
+        timings.append(time.perf_counter() - start)
+        assert results, f"Title search for {query!r} returned nothing on {len(catalogue)} titles"
+    return {"p50_ms": np.percentile(timings, 50) * 1e3, "p99_ms": np.percentile(timings, 99) * 1e3}
+
+
+def dense_to_neighbors(similarity, top_k):
+    """Converts a dense similarity DataFrame into top-K neighbour lists."""
+    block = similarity.to_numpy(dtype=np.float32, copy=True)
+    np.fill_diagonal(block, -np.inf)
+    idx, scores = top_k_rows(block, top_k)
+    idx[scores <= 0] = -1
+    scores[scores <= 0] = 0
+    return MovieNeighbors(similarity.index.to_numpy(), idx.astype(np.int32), scores)
+
+
+def index_to_neighbors(index, top_k):
+    """Materialises an approximate index as neighbour lists by querying every movie."""
+    idx = np.full((len(index), top_k), -1, dtype=np.int32)
+    scores = np.zeros((len(index), top_k), dtype=np.float32)
+    for row, movie_id in enumerate(index.movie_ids):
+        similar_ids, similar_scores = index.neighbors(movie_id, top_k)
+        keep = similar_scores > 0
+        idx[row, :keep.sum()] = np.searchsorted(index.movie_ids, similar_ids[keep])
+        scores[row, :keep.sum()] = similar_scores[keep]
+    return MovieNeighbors(index.movie_ids, idx, scores)
+
+
+class Backend:
+    """A similarity backend: how to build it, query it, and produce per-user rankings."""
+
+    def __init__(self, name, build, query, as_neighbors=None, max_scale=None):
+        self.name = name
+        self.build = build
+        self.query = query
+        self.as_neighbors = as_neighbors
+        self.max_scale = max_scale
+
+
+def item_query(model, rng, k):
+    movie_ids = model.index if isinstance(model, pd.DataFrame) else model.movie_ids
+    top_k_similar(movie_ids[rng.integers(len(movie_ids))], k, model)
+
+
+def user_query(model, rng, k):
+    recommend_for_user(model.user_ids[rng.integers(len(model.user_ids))], k, model, {})
+
+
+BACKENDS = {
+    "dense": Backend(
+        "dense", lambda movies, ratings, top_k: compute_movie_similarity(ratings), item_query,
+        dense_to_neighbors, max_scale=1,
+    ),
+    "sparse": Backend(
+        "sparse", lambda movies, ratings, top_k: build_movie_similarity(ratings, top_k=top_k), item_query,
+        lambda model, top_k: model,
+    ),
+    "hybrid": Backend(
+        "hybrid", lambda movies, ratings, top_k: build_hybrid_similarity(movies, ratings, top_k=top_k), item_query,
+        lambda model, top_k: model,
+    ),
+    "ann": Backend(
+        "ann", lambda movies, ratings, top_k: build_factor_index(ratings), item_query,
+        index_to_neighbors,
+    ),
+    "user": Backend(
+        "user", lambda movies, ratings, top_k: build_user_similarity(ratings, top_n=top_k), user_query,
+    ),
+}
+
+
+def rank_metrics(recommended, relevant, k):
+    """Returns precision@k, recall@k and NDCG@k for one user."""
+    hits = np.isin(recommended[:k], list(relevant))
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    ideal = discounts[:min(len(relevant), k)].sum()
+    return hits.sum() / k, hits.sum() / len(relevant), (hits * discounts[:len(hits)]).sum() / ideal
+
+
+def evaluate(backend, model, train, test, k, top_k, max_users, seed=0):
+    """Averages ranking metrics over a sample of test users."""
+    relevant = test[test["rating"] >= RELEVANT_RATING].groupby("userId")["movieId"].apply(set)
+    users = relevant.index.to_numpy()
+    if len(users) > max_users:
+        users = np.random.default_rng(seed).choice(users, max_users, replace=False)
+
+    if backend.as_neighbors is not None:
+        train_users = train[train["userId"].isin(users)]
+        liked = train_users[train_users["rating"] >= RELEVANT_RATING]
+        seeds = liked.groupby("userId")["movieId"].apply(list).to_dict()
+        rails = recommend_for_users(seeds, k, backend.as_neighbors(model, top_k), train_users)
+        ranked = rails.groupby("userId")["movieId"].apply(list).to_dict()
+    else:
+        ranked = {user: recommend_for_user(user, k, model, {})["movieId"].tolist() for user in users}
+
+    scores = np.array([rank_metrics(np.asarray(ranked.get(user, [])), relevant[user], k) for user in users])
+    return dict(zip([f"precision@{k}", f"recall@{k}", f"ndcg@{k}"], scores.mean(axis=0)))
+
+
+def measure_latency(backend, model, k, n_queries, seed=0):
+    """Returns p50 and p99 single-query latency in milliseconds."""
+    rng = np.random.default_rng(seed)
+    timings = np.empty(n_queries)
+    for i in range(n_queries):
+        start = time.perf_counter()
+        backend.query(model, rng, k)
+        timings[i] = time.perf_counter() - start
+    return {"p50_ms": np.percentile(timings, 50) * 1e3, "p99_ms": np.percentile(timings, 99) * 1e3}
+
+
+def measure_build(backend, movies, train, top_k, trace_memory=True):
+    """
+    Returns (model, build seconds, peak MB). The timed build runs untraced;
+    peak memory comes from a second build under tracemalloc, whose overhead
+    would otherwise inflate the timing. Peak is NaN with trace_memory=False.
+    """
+    start = time.perf_counter()
+    model = backend.build(movies, train, top_k)
+    build_seconds = time.perf_counter() - start
+
+    peak_mb = float("nan")
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            backend.build(movies, train, top_k)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return model, build_seconds, peak_mb
+
+
+def run(backends, scales, k, top_k, n_queries, max_users, trace_memory=True):
+    movies, ratings = load_data()
+    results = []
+
+    for scale in scales:
+        train, test = split_ratings(scale_ratings(ratings, scale))
+        for name in backends:
+            backend = BACKENDS[name]
+            if backend.max_scale is not None and scale > backend.max_scale:
+                print(f"⏭️ Skipping {name} at {scale}x (does not scale past {backend.max_scale}x)")
+                continue
+
+            model, build_seconds, peak_mb = measure_build(backend, movies, train, top_k, trace_memory)
+
+            row = {"backend": name, "scale": scale, "ratings": len(train),
+                   "build_s": build_seconds, "peak_mb": peak_mb}
+            row.update(measure_latency(backend, model, k, n_queries))
+            # Ranking quality is only meaningful on real (unscaled) users
+            if scale == 1:
+                row.update(evaluate(backend, model, train, test, k, top_k, max_users))
+            results.append(row)
+            print(f"✅ {name} @ {scale}x: build {build_seconds:.2f}s, peak {peak_mb:.0f} MB")
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark recommender backends for quality, speed and memory.")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10], help="Rating scale-up factors, e.g. 1 10 100.")
+    parser.add_argument("--k", type=int, default=10, help="Cut-off for precision/recall/NDCG.")
+    parser.add_argument("--top-k", type=int, default=50, help="Neighbours kept per item/user.")
+    parser.add_argument("--queries", type=int, default=1000, help="Single queries timed per backend.")
+    parser.add_argument("--eval-users", type=int, default=500, help="Test users sampled for ranking metrics.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the second, traced build for peak memory.")
+    parser.add_argument("--titles", type=int, default=1_000_000,
+                        help="Catalogue size for the title-search check; 0 skips it.")
+    parser.add_argument("--out", help="Optional CSV path for the results table.")
+    args = parser.parse_args()
+
+    report = run(args.backends, args.scales, args.k, args.top_k, args.queries, args.eval_users,
+                 trace_memory=not args.no_memory)
+    print("\n📊 Benchmark results:")
+    print(report.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+    if args.out:
+        report.to_csv(args.out, index=False)
+
+    if args.titles:
+        latency = check_title_search(load_data()[0], args.titles)
+        print(f"✅ Title search: p50 {latency['p50_ms']:.2f} ms, p99 {latency['p99_ms']:.2f} ms")
@@ -0,0 +1,19 @@
+import argparse
+
+from src.content import build_hybrid_similarity
+from src.data_loader import load_data
+from src.similarity import INDEX_DIR, save_movie_neighbors
+
+# Offline step: precompute movie neighbour lists for the Streamlit app
+parser = argparse.ArgumentParser(description="Build the on-disk movie similarity index.")
+parser.add_argument("--top-k", type=int, default=50, help="Neighbours kept per movie.")
+parser.add_argument("--alpha", type=float, default=0.8,
+                    help="Weight of rating similarity vs genre/title similarity (1 = ratings only).")
+parser.add_argument("--out", default=INDEX_DIR, help="Output directory for the index files.")
+args = parser.parse_args()
+
+movies, ratings = load_data()
+movie_neighbors = build_hybrid_similarity(movies, ratings, alpha=args.alpha, top_k=args.top_k)
+save_movie_neighbors(movie_neighbors, args.out)
+
+print(f"✅ Indexed {len(movie_neighbors)} movies (top {movie_neighbors.k}) in {args.out}")
@@ -1,26 +1,23 @@
-from src.data_loader import load_data
-from src.similarity import build_user_similarity, build_movie_similarity
-from src.recommender import recommend_movies
 import sys
 import os
 
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
-from src.data_loader import load_data 
+from src.data_loader import load_data
+from src.similarity import build_user_similarity
+from src.recommender import recommend_for_user
 
 # Load Data
 movies, ratings = load_data()
 
-# Build Similarity Matrices
+# Build User Neighbourhoods
 user_similarity = build_user_similarity(ratings)
-movie_similarity = build_movie_similarity(ratings)
 
 # User input
 user_id_to_recommend = int(input("Enter user ID for recommendations: "))
 
 # Generate recommendations
-recommended_movies = recommend_movies(user_id_to_recommend, user_similarity, movie_similarity, ratings, movies)
+recommended_movies = recommend_for_user(user_id_to_recommend, 10, user_similarity, movies)
 
 print("\nRecommended Movies:")
 print(recommended_movies)
@@ -0,0 +1,131 @@
+import re
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from .similarity import MovieNeighbors, build_movie_similarity, cosine_top_k, sparse_top_k
+
+NO_GENRES = "(no genres listed)"
+YEAR_PATTERN = re.compile(r"\s*\(\d{4}\)\s*$")
+
+
+def _tfidf(vectorizer, texts):
+    """Row-normalised TF-IDF of texts, or None if no term survives (tiny catalogues, min_df)."""
+    try:
+        return normalize(vectorizer.fit_transform(texts))
+    except ValueError:  # sklearn's "empty vocabulary" / "no terms remain" errors
+        return None
+
+
+def build_content_matrix(movies, title_weight=0.3):
+    """
+    Builds a sparse TF-IDF feature matrix from genres and title tokens.
+
+    Parameters:
+        movies (pd.DataFrame): Movie metadata with columns ["movieId", "title", "genres"].
+        title_weight (float): Share of the feature weight given to title tokens (0 = genres only).
+            If no title token occurs in at least two titles, genres alone are used.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix, movie_ids) with rows sorted by movieId.
+    """
+    movies = movies.sort_values("movieId")
+    genres = movies["genres"].astype(str).str.replace(NO_GENRES, "", regex=False)
+    titles = movies["title"].astype(str).str.replace(YEAR_PATTERN, "", regex=True)
+
+    genre_matrix = _tfidf(TfidfVectorizer(
+        tokenizer=lambda text: [genre for genre in text.split("|") if genre],
+        lowercase=False, token_pattern=None,
+    ), genres)
+    title_matrix = None
+    if title_weight > 0:
+        title_matrix = _tfidf(TfidfVectorizer(stop_words="english", min_df=2), titles)
+
+    if genre_matrix is not None and title_matrix is not None:
+        blocks = [np.sqrt(1 - title_weight) * genre_matrix, np.sqrt(title_weight) * title_matrix]
+    else:
+        # Whichever part has a vocabulary carries the full weight; with neither, movies have no neighbours
+        blocks = [block for block in (genre_matrix, title_matrix) if block is not None]
+        blocks = blocks or [sparse.csr_matrix((len(movies), 1))]
+
+    matrix = sparse.hstack(blocks, format="csr", dtype=np.float32)
+    return matrix, movies["movieId"].to_numpy()
+
+
+def build_content_similarity(movies, top_k=50, title_weight=0.3, chunk_size=512):
+    """
+    Computes top-K content neighbours for every movie, rated or not.
+
+    Parameters:
+        movies (pd.DataFrame): Movie metadata with columns ["movieId", "title", "genres"].
+        top_k (int): Number of neighbours to keep per movie.
+        title_weight (float): Share of the feature weight given to title tokens.
+        chunk_size (int): Number of movies scored per block.
+
+    Returns:
+        MovieNeighbors: Neighbour lists, or None if the movie table is empty.
+    """
+    if movies is None or movies.empty:
+        print("❌ Error: Movie data is empty or missing!")
+        return None
+
+    matrix, movie_ids = build_content_matrix(movies, title_weight)
+    neighbor_idx, neighbor_scores = cosine_top_k(matrix, top_k, chunk_size)
+    return MovieNeighbors(movie_ids, neighbor_idx, neighbor_scores)
+
+
+def _expand(neighbors, ids):
+    """Re-indexes a neighbour matrix onto a larger sorted ID space."""
+    rows = np.searchsorted(ids, neighbors.ids)
+    matrix = neighbors.to_sparse().tocoo()
+    return sparse.csr_matrix(
+        (matrix.data, (rows[matrix.row], rows[matrix.col])), shape=(len(ids), len(ids))
+    )
+
+
+def blend_similarity(rating_neighbors, content_neighbors, alpha=0.8, top_k=50):
+    """
+    Blends rating-based and content-based neighbour lists.
+
+    The blended score is alpha * rating similarity + (1 - alpha) * content
+    similarity over the union of both lists, so movies without ratings still
+    get content-based neighbours.
+
+    Parameters:
+        rating_neighbors (MovieNeighbors): Output of build_movie_similarity.
+        content_neighbors (MovieNeighbors): Output of build_content_similarity.
+        alpha (float): Weight of the rating-based similarity, between 0 and 1.
+        top_k (int): Number of neighbours to keep per movie.
+
+    Returns:
+        MovieNeighbors: Blended neighbour lists over every movie in either input.
+    """
+    ids = np.union1d(rating_neighbors.ids, content_neighbors.ids)
+    combined = alpha * _expand(rating_neighbors, ids) + (1 - alpha) * _expand(content_neighbors, ids)
+    neighbor_idx, neighbor_scores = sparse_top_k(combined, top_k)
+    return MovieNeighbors(ids, neighbor_idx, neighbor_scores)
+
+
+def build_hybrid_similarity(movies, ratings, alpha=0.8, top_k=50, title_weight=0.3):
+    """
+    Builds rating, content and blended neighbour lists in one call.
+
+    Parameters:
+        movies (pd.DataFrame): Movie metadata with columns ["movieId", "title", "genres"].
+        ratings (pd.DataFrame): User ratings dataset with columns ["userId", "movieId", "rating"].
+        alpha (float): Weight of the rating-based similarity; 1 disables content scores.
+        top_k (int): Number of neighbours to keep per movie.
+        title_weight (float): Share of the content weight given to title tokens.
+
+    Returns:
+        MovieNeighbors: Blended neighbour lists.
+    """
+    rating_neighbors = build_movie_similarity(ratings, top_k=top_k)
+    if alpha >= 1:
+        return rating_neighbors
+
+    content_neighbors = build_content_similarity(movies, top_k=top_k, title_weight=title_weight)
+    if rating_neighbors is None:
+        return content_neighbors
+    return blend_similarity(rating_neighbors, content_neighbors, alpha=alpha, top_k=top_k)
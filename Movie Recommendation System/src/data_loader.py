@@ -1,22 +1,127 @@
 import os
+import numpy as np
 import pandas as pd
 
-def load_data():
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+
+# Compact dtypes: int32 ids, float32 ratings and categorical genres
+MOVIE_DTYPES = {"movieId": np.int32, "title": str, "genres": "category"}
+RATING_DTYPES = {"userId": np.int32, "movieId": np.int32, "rating": np.float32, "timestamp": np.int64}
+
+STAMP_KEY = "__source_stamp__"
+
+
+def _source_stamp(csv_path):
+    """Identifies a CSV version by its size and modification time."""
+    stat = os.stat(csv_path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _save_cache(df, cache_path, stamp):
+    """Writes every column of df to an uncompressed .npz next to its source stamp."""
+    arrays = {STAMP_KEY: stamp}
+    for name, column in df.items():
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            arrays[f"{name}.codes"] = column.cat.codes.to_numpy()
+            arrays[f"{name}.categories"] = column.cat.categories.to_numpy(dtype=str)
+        elif column.dtype.kind in "iuf":
+            arrays[name] = column.to_numpy()
+        else:
+            arrays[name] = column.to_numpy(dtype=str)
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(tmp_path, cache_path)
+
+
+def _load_cache(cache_path, stamp, dtypes, columns):
+    """Returns the cached frame, or None if the cache is missing or stale."""
+    if not os.path.exists(cache_path):
+        return None
+
+    # NpzFile reads arrays lazily, so pruned columns are never loaded
+    with np.load(cache_path) as cached:
+        if STAMP_KEY not in cached.files or not np.array_equal(cached[STAMP_KEY], stamp):
+            return None
+
+        data = {}
+        for name in columns or dtypes:
+            if dtypes.get(name) == "category":
+                data[name] = pd.Categorical.from_codes(cached[f"{name}.codes"], cached[f"{name}.categories"])
+            else:
+                data[name] = cached[name]
+    return pd.DataFrame(data)
+
+
+def read_table(csv_path, dtypes, columns=None, use_cache=True):
     """
-    Load movie and ratings data from CSV files.
+    Reads a CSV with explicit dtypes, serving it from a binary cache when unchanged.
+
+    Parameters:
+        csv_path (str): Path to the CSV file.
+        dtypes (dict): Column name -> dtype used for parsing.
+        columns (list): Optional subset of columns to return.
+        use_cache (bool): Read/write the .npz cache under data/.cache.
+
     Returns:
-        df_movies (pd.DataFrame): Movie metadata.
-        df_ratings (pd.DataFrame): User-movie ratings.
+        pd.DataFrame: The table with compact dtypes.
     """
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+    cache_path = os.path.join(CACHE_DIR, os.path.basename(csv_path) + ".npz")
+    stamp = _source_stamp(csv_path)
+
+    if use_cache:
+        df = _load_cache(cache_path, stamp, dtypes, columns)
+        if df is not None:
+            return df
+
+        # Parse every column once so later calls can prune from the cache
+        df = pd.read_csv(csv_path, dtype=dtypes)
+        try:
+            _save_cache(df, cache_path, stamp)
+        except OSError as e:
+            # A read-only data/ only costs the speed-up; the parsed frame is still good
+            print(f"⚠️ Could not write the data cache {cache_path}: {e}")
+        return df[columns] if columns else df
 
-    movies_path = os.path.join(base_dir, "movies.csv")
-    ratings_path = os.path.join(base_dir, "ratings.csv")
+    return pd.read_csv(csv_path, dtype=dtypes, usecols=columns)
 
-    if not os.path.exists(movies_path) or not os.path.exists(ratings_path):
+
+def _data_path(file_name):
+    path = os.path.join(DATA_DIR, file_name)
+    if not os.path.exists(path):
         raise FileNotFoundError("❌ Data files not found! Please check the 'data' folder.")
+    return path
+
+
+def load_movies(columns=None, use_cache=True):
+    """Load only the movie metadata; see load_data."""
+    return read_table(_data_path("movies.csv"), MOVIE_DTYPES, columns, use_cache)
+
+
+def load_ratings(columns=None, use_cache=True):
+    """Load only the user-movie ratings; see load_data."""
+    return read_table(_data_path("ratings.csv"), RATING_DTYPES, columns, use_cache)
+
 
-    df_movies = pd.read_csv(movies_path)
-    df_ratings = pd.read_csv(ratings_path)
+def load_data(movie_columns=None, rating_columns=None, use_cache=True):
+    """
+    Load movie and ratings data from CSV files.
+
+    Parameters:
+        movie_columns (list): Optional subset of movie columns to load.
+        rating_columns (list): Optional subset of rating columns to load.
+        use_cache (bool): Reuse the binary cache while the CSV files are unchanged.
+
+    Returns:
+        df_movies (pd.DataFrame): Movie metadata.
+        df_ratings (pd.DataFrame): User-movie ratings.
+    """
+    for file_name in ("movies.csv", "ratings.csv"):
+        _data_path(file_name)  # Fail before parsing either file
+    df_movies = load_movies(movie_columns, use_cache)
+    df_ratings = load_ratings(rating_columns, use_cache)
 
     return df_movies, df_ratings
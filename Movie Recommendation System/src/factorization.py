@@ -0,0 +1,194 @@
+import numpy as np
+from scipy.sparse.linalg import svds
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import normalize
+
+from .similarity import build_rating_matrix
+
+
+class MatrixFactors:
+    """Compact float32 movie and user factors from a truncated SVD of the rating matrix."""
+
+    def __init__(self, movie_ids, movie_factors, user_ids, user_factors):
+        """
+        Parameters:
+            movie_ids (np.ndarray): Sorted movieId of every row of movie_factors.
+            movie_factors (np.ndarray): (n_movies, n_factors) float32 movie embeddings.
+            user_ids (np.ndarray): Sorted userId of every row of user_factors.
+            user_factors (np.ndarray): (n_users, n_factors) float32 user embeddings.
+        """
+        self.movie_ids = movie_ids
+        self.movie_factors = movie_factors
+        self.user_ids = user_ids
+        self.user_factors = user_factors
+
+
+def train_factors(ratings, n_factors=64, seed=0):
+    """
+    Factorises the mean-centred user x movie rating matrix with a truncated SVD.
+
+    Parameters:
+        ratings (pd.DataFrame): User ratings dataset with columns ["userId", "movieId", "rating"].
+        n_factors (int): Embedding dimension.
+        seed (int): Seed for the ARPACK start vector.
+
+    Returns:
+        MatrixFactors: Trained factors, or None if the ratings are empty.
+    """
+    if ratings is None or ratings.empty:
+        print("❌ Error: Ratings data is empty or missing!")
+        return None
+
+    matrix, movie_ids, user_ids = build_rating_matrix(ratings)
+    user_ratings = matrix.T.tocsr()
+
+    counts = np.diff(user_ratings.indptr)
+    means = np.asarray(user_ratings.sum(axis=1)).ravel() / np.maximum(counts, 1)
+    user_ratings.data -= np.repeat(means, counts).astype(np.float32)
+
+    n_factors = min(n_factors, min(user_ratings.shape) - 1)
+    v0 = np.random.default_rng(seed).uniform(-1, 1, min(user_ratings.shape))
+    u, s, vt = svds(user_ratings.astype(np.float64), k=n_factors, v0=v0)
+
+    # Split the singular values evenly between both sides
+    root_s = np.sqrt(s)
+    return MatrixFactors(
+        movie_ids,
+        np.ascontiguousarray((vt.T * root_s).astype(np.float32)),
+        user_ids,
+        np.ascontiguousarray((u * root_s).astype(np.float32)),
+    )
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index over L2-normalised vectors.
+
+    Vectors are clustered with k-means into n_lists lists stored contiguously.
+    A query scans only the n_probe lists whose centroids score highest, so
+    raising n_probe trades latency for recall (n_probe == n_lists is exact).
+    """
+
+    def __init__(self, vectors, n_lists=None, n_probe=8, seed=0):
+        """
+        Parameters:
+            vectors (np.ndarray): (n, d) float32 vectors; normalised internally.
+            n_lists (int): Number of inverted lists, defaults to about sqrt(n).
+            n_probe (int): Lists scanned per query.
+            seed (int): Seed for k-means.
+        """
+        vectors = normalize(np.asarray(vectors, dtype=np.float32))
+        n_lists = n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+
+        kmeans = KMeans(n_clusters=n_lists, n_init=1, random_state=seed).fit(vectors)
+        assignments = kmeans.labels_
+        order = np.argsort(assignments, kind="stable")
+
+        self.centroids = normalize(kmeans.cluster_centers_.astype(np.float32))
+        self.list_offsets = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        self.list_rows = order.astype(np.int32)
+        self.vectors = np.ascontiguousarray(vectors[order])
+        self.n_probe = n_probe
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def search(self, query, k, n_probe=None, exclude=-1):
+        """
+        Finds the approximate top-k vectors by cosine similarity.
+
+        Parameters:
+            query (np.ndarray): (d,) query vector.
+            k (int): Number of results.
+            n_probe (int): Overrides the index default for this query.
+            exclude (int): Original row to leave out of the results, e.g. the query itself.
+
+        Returns:
+            tuple: (rows, scores) in descending score order.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+
+        probe = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        candidates = np.concatenate([
+            np.arange(self.list_offsets[i], self.list_offsets[i + 1]) for i in probe
+        ])
+        scores = self.vectors[candidates] @ query
+        if exclude >= 0:
+            scores[self.list_rows[candidates] == exclude] = -np.inf
+
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return self.list_rows[:0], scores[:0]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self.list_rows[candidates[top]], scores[top]
+
+
+class MovieEmbeddingIndex:
+    """Movie-to-movie recommendation backend over factor embeddings and an IVF index."""
+
+    def __init__(self, factors, n_lists=None, n_probe=8, seed=0):
+        """
+        Parameters:
+            factors (MatrixFactors): Output of train_factors.
+            n_lists (int): Number of inverted lists, defaults to about sqrt(n_movies).
+            n_probe (int): Lists scanned per query.
+            seed (int): Seed for k-means.
+        """
+        self.factors = factors
+        self.movie_ids = factors.movie_ids
+        self.index = IVFIndex(factors.movie_factors, n_lists=n_lists, n_probe=n_probe, seed=seed)
+
+    def row(self, movie_id):
+        """Returns the row of a movieId, or -1 if it is not indexed."""
+        row = int(np.searchsorted(self.movie_ids, movie_id))
+        if row < len(self.movie_ids) and self.movie_ids[row] == movie_id:
+            return row
+        return -1
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def __contains__(self, movie_id):
+        return self.row(movie_id) >= 0
+
+    def neighbors(self, movie_id, k=10):
+        """
+        Returns the approximate nearest movies in embedding space.
+
+        Parameters:
+            movie_id (int): The movie ID to look up.
+            k (int): Number of neighbours.
+
+        Returns:
+            tuple: (movie_ids, scores) in descending score order.
+        """
+        row = self.row(movie_id)
+        if row < 0:
+            raise KeyError(movie_id)
+        rows, scores = self.index.search(self.factors.movie_factors[row], k, exclude=row)
+        return self.movie_ids[rows], scores
+
+
+def build_factor_index(ratings, n_factors=64, n_lists=None, n_probe=8, seed=0):
+    """
+    Trains movie factors and wraps them in an approximate nearest-neighbour index.
+
+    Parameters:
+        ratings (pd.DataFrame): User ratings dataset with columns ["userId", "movieId", "rating"].
+        n_factors (int): Embedding dimension.
+        n_lists (int): Number of inverted lists, defaults to about sqrt(n_movies).
+        n_probe (int): Lists scanned per query; higher is slower but more accurate.
+        seed (int): Seed for SVD and k-means.
+
+    Returns:
+        MovieEmbeddingIndex: Recommendation backend usable with recommend_movies, or None.
+    """
+    factors = train_factors(ratings, n_factors=n_factors, seed=seed)
+    if factors is None:
+        return None
+    return MovieEmbeddingIndex(factors, n_lists=n_lists, n_probe=n_probe, seed=seed)
@@ -0,0 +1,175 @@
+import numpy as np
+from scipy import sparse
+
+from .similarity import MovieNeighbors, top_k_rows
+
+
+class IncrementalMovieSimilarity:
+    """
+    Movie top-K cosine neighbour lists that can absorb new ratings in place.
+
+    Keeps the sparse movie x user rating matrix and every movie's squared norm.
+    A batch of ratings only rescores the movies it touches: their rows are
+    recomputed, and every other movie merges the new scores against those movies
+    into its existing list. A list is rescored exactly only when one of its
+    neighbours drops out and an unseen movie could take its place.
+    """
+
+    def __init__(self, top_k=50, chunk_size=512):
+        """
+        Parameters:
+            top_k (int): Number of neighbours to keep per movie.
+            chunk_size (int): Number of movies scored per block.
+        """
+        self.top_k = top_k
+        self.chunk_size = chunk_size
+        self.movie_ids = np.empty(0, dtype=np.int64)
+        self.movie_row = {}
+        self.user_col = {}
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.sq_norms = np.zeros(0, dtype=np.float64)
+        self.neighbor_idx = np.full((0, top_k), -1, dtype=np.int32)
+        self.neighbor_scores = np.zeros((0, top_k), dtype=np.float32)
+
+    @classmethod
+    def from_ratings(cls, ratings, top_k=50, chunk_size=512):
+        """Builds the index from an initial ratings table."""
+        index = cls(top_k=top_k, chunk_size=chunk_size)
+        index.add_ratings(ratings)
+        return index
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def _lookup(self, ids, mapping):
+        """Maps IDs to rows/columns, appending unseen IDs at the end."""
+        positions = np.empty(len(ids), dtype=np.int64)
+        new_ids = []
+        for i, item_id in enumerate(ids.tolist()):
+            pos = mapping.get(item_id)
+            if pos is None:
+                pos = mapping[item_id] = len(mapping)
+                new_ids.append(item_id)
+            positions[i] = pos
+        return positions, np.asarray(new_ids, dtype=np.int64)
+
+    def add_ratings(self, ratings):
+        """
+        Applies a batch of ratings and refreshes only the affected neighbour lists.
+
+        Parameters:
+            ratings (pd.DataFrame): Rows with columns ["userId", "movieId", "rating"].
+                A rating for an existing (userId, movieId) pair replaces the old one.
+
+        Returns:
+            np.ndarray: movieIds whose own ratings changed.
+        """
+        if ratings is None or ratings.empty:
+            return np.empty(0, dtype=np.int64)
+
+        ratings = ratings.drop_duplicates(["userId", "movieId"], keep="last")
+        rows, new_movies = self._lookup(ratings["movieId"].to_numpy(dtype=np.int64), self.movie_row)
+        cols, _ = self._lookup(ratings["userId"].to_numpy(dtype=np.int64), self.user_col)
+        values = ratings["rating"].to_numpy(dtype=np.float32)
+
+        n_movies, n_users = len(self.movie_row), len(self.user_col)
+        if len(new_movies):
+            self.movie_ids = np.concatenate((self.movie_ids, new_movies))
+            self.sq_norms = np.concatenate((self.sq_norms, np.zeros(len(new_movies))))
+            self.neighbor_idx = np.vstack((self.neighbor_idx, np.full((len(new_movies), self.top_k), -1, dtype=np.int32)))
+            self.neighbor_scores = np.vstack((self.neighbor_scores, np.zeros((len(new_movies), self.top_k), dtype=np.float32)))
+        self.matrix.resize((n_movies, n_users))
+
+        # Apply the batch as a delta so re-ratings replace instead of add
+        old_values = np.asarray(self.matrix[rows, cols]).ravel()
+        self.matrix = (self.matrix + sparse.csr_matrix(
+            (values - old_values, (rows, cols)), shape=(n_movies, n_users)
+        )).tocsr()
+        np.add.at(self.sq_norms, rows, values.astype(np.float64) ** 2 - old_values.astype(np.float64) ** 2)
+
+        affected = np.unique(rows)
+        self._refresh(affected)
+        return self.movie_ids[affected]
+
+    @staticmethod
+    def _cosine(dots, row_norms, col_norms):
+        """Turns a dense block of dot products into cosine scores."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            block = dots / row_norms[:, None] / col_norms[None, :]
+        block[~np.isfinite(block)] = 0
+        return block
+
+    def _store(self, rows, idx, scores):
+        """Writes top-K results, turning non-positive scores into padding."""
+        idx = np.where(scores > 0, idx, -1)
+        scores = np.where(scores > 0, scores, 0)
+        self.neighbor_idx[rows, :idx.shape[1]] = idx
+        self.neighbor_idx[rows, idx.shape[1]:] = -1
+        self.neighbor_scores[rows, :scores.shape[1]] = scores
+        self.neighbor_scores[rows, scores.shape[1]:] = 0
+
+    def _refresh(self, affected):
+        matrix_t = self.matrix.T.tocsr()
+        norms = np.sqrt(self.sq_norms)
+        n_movies = len(self.movie_ids)
+        is_affected = np.zeros(n_movies, dtype=bool)
+        is_affected[affected] = True
+
+        # Dot products of the affected movies with everything, kept sparse
+        dots = (self.matrix[affected] @ matrix_t).tocsr()
+
+        # Affected rows are recomputed exactly
+        for start in range(0, len(affected), self.chunk_size):
+            chunk = affected[start:start + self.chunk_size]
+            block = self._cosine(dots[start:start + len(chunk)].toarray(), norms[chunk], norms)
+            block[np.arange(len(chunk)), chunk] = -np.inf
+            self._store(chunk, *top_k_rows(block, self.top_k))
+
+        # Other movies that co-occur with an affected movie or list one as a neighbour
+        touched = np.zeros(n_movies, dtype=bool)
+        touched[dots.indices] = True
+        touched[np.nonzero(is_affected[self.neighbor_idx.clip(0)] & (self.neighbor_idx >= 0))[0]] = True
+        touched[affected] = False
+        others = np.flatnonzero(touched)
+        dots_t = dots.T.tocsr()
+
+        # Merge new scores into their lists; rescore rows that may have lost a neighbour
+        rescore = []
+        for start in range(0, len(others), self.chunk_size):
+            chunk = others[start:start + self.chunk_size]
+            cross = self._cosine(dots_t[chunk].toarray(), norms[chunk], norms[affected])
+
+            old_idx = self.neighbor_idx[chunk]
+            old_scores = self.neighbor_scores[chunk]
+            was_full = old_idx[:, -1] >= 0
+            threshold = old_scores[:, -1]
+
+            stale = (old_idx < 0) | is_affected[old_idx.clip(0)]
+            merged_idx = np.hstack((old_idx, np.broadcast_to(affected, (len(chunk), len(affected)))))
+            merged_scores = np.hstack((np.where(stale, 0, old_scores), cross))
+
+            top_idx, top_scores = top_k_rows(merged_scores, self.top_k)
+            self._store(chunk, np.take_along_axis(merged_idx, top_idx, axis=1), top_scores)
+            rescore.append(chunk[was_full & (top_scores[:, -1] < threshold)])
+
+        rescore = np.concatenate(rescore) if rescore else np.empty(0, dtype=np.int64)
+        for start in range(0, len(rescore), self.chunk_size):
+            chunk = rescore[start:start + self.chunk_size]
+            block = self._cosine((self.matrix[chunk] @ matrix_t).toarray(), norms[chunk], norms)
+            block[np.arange(len(chunk)), chunk] = -np.inf
+            self._store(chunk, *top_k_rows(block, self.top_k))
+
+    def to_neighbors(self):
+        """
+        Exports the current lists in the MovieNeighbors layout (sorted movieIds).
+
+        Returns:
+            MovieNeighbors: Snapshot usable with recommend_movies and save_movie_neighbors.
+        """
+        order = np.argsort(self.movie_ids, kind="stable")
+        new_row = np.empty_like(order)
+        new_row[order] = np.arange(len(order))
+
+        idx = self.neighbor_idx[order]
+        remapped = np.where(idx >= 0, new_row[idx.clip(0)], -1).astype(np.int32)
+        return MovieNeighbors(self.movie_ids[order], remapped, self.neighbor_scores[order].copy())
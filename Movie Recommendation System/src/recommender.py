@@ -1,4 +1,64 @@
+import numpy as np
 import pandas as pd
+from scipy import sparse
+
+from .similarity import top_k_rows
+
+RECOMMENDATION_COLUMNS = ["movieId", "title", "score"]
+
+
+def build_title_index(movies):
+    """
+    Builds an O(1) movieId -> title lookup.
+
+    Parameters:
+        movies (pd.DataFrame): Movie metadata with columns ["movieId", "title"].
+
+    Returns:
+        dict: Mapping of movieId to title.
+    """
+    return dict(zip(movies["movieId"].tolist(), movies["title"].tolist()))
+
+
+def top_k_similar(movie_id, k, movie_similarity):
+    """
+    Returns the k most similar movies without sorting the full similarity row.
+
+    Parameters:
+        movie_id (int): The movie ID for which neighbours are needed.
+        k (int): Number of neighbours to return.
+        movie_similarity (pd.DataFrame | MovieNeighbors | MovieEmbeddingIndex): Dense
+            similarity matrix, top-K neighbour lists from build_movie_similarity or
+            an approximate index from build_factor_index.
+
+    Returns:
+        tuple: (movie_ids, scores) as NumPy arrays in descending score order,
+        or None if movie_id is not in the similarity data.
+    """
+    if hasattr(movie_similarity, "neighbors"):
+        if movie_id not in movie_similarity:
+            return None
+
+        # Index backends return neighbours already sorted by similarity
+        return movie_similarity.neighbors(movie_id, k)
+
+    try:
+        pos = movie_similarity.index.get_loc(movie_id)
+    except KeyError:
+        return None
+
+    row = movie_similarity.to_numpy()[pos].copy()
+    row[pos] = -np.inf  # Never recommend the seed movie itself
+
+    k = min(k, len(row) - 1)
+    if k <= 0:
+        return movie_similarity.index.to_numpy()[:0], row[:0]
+
+    # Partial selection of the top k, then sort only those k
+    top = np.argpartition(-row, k - 1)[:k]
+    top = top[np.argsort(-row[top], kind="stable")]
+    return movie_similarity.index.to_numpy()[top], row[top]
+
 
 def recommend_movies(movie_id, num_recommendations, movie_similarity, ratings, movies):
     """
@@ -7,26 +67,189 @@ def recommend_movies(movie_id, num_recommendations, movie_similarity, ratings, m
     Parameters:
         movie_id (int): The movie ID for which recommendations are needed.
         num_recommendations (int): Number of recommendations to return.
-        movie_similarity (pd.DataFrame): Precomputed movie similarity matrix.
+        movie_similarity (pd.DataFrame | MovieNeighbors | MovieEmbeddingIndex): Precomputed
+            movie similarity matrix, top-K neighbour lists from build_movie_similarity or
+            an approximate embedding index from build_factor_index.
         ratings (pd.DataFrame): User ratings dataset.
-        movies (pd.DataFrame): Movie metadata.
+        movies (pd.DataFrame | dict): Movie metadata, or a title index from build_title_index.
 
     Returns:
-        pd.DataFrame: Recommended movies with titles.
+        pd.DataFrame: Recommended movies with titles and scores, best match first.
     """
 
     if movie_similarity is None:
         print("❌ Error: Movie similarity matrix is missing!")
-        return pd.DataFrame(columns=["movieId", "title"])  # Return empty DataFrame to prevent errors
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)  # Return empty DataFrame to prevent errors
 
-    if movie_id not in movie_similarity.index:
+    similar = top_k_similar(movie_id, num_recommendations, movie_similarity)
+    if similar is None:
         print(f"❌ Error: Movie ID {movie_id} not found in similarity matrix!")
-        return pd.DataFrame(columns=["movieId", "title"])  # Return empty DataFrame if movie_id not found
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)  # Return empty DataFrame if movie_id not found
+
+    # Map movie IDs to titles, keeping the similarity order
+    titles = movies if isinstance(movies, dict) else build_title_index(movies)
+    similar_ids, scores = similar
+    return pd.DataFrame({
+        "movieId": similar_ids,
+        "title": [titles.get(int(similar_id)) for similar_id in similar_ids],
+        "score": scores,
+    })
+
+
+def _ranked_batch(keys, key_name, seed_matrix, num_recommendations, movie_neighbors, exclude=None, chunk_size=256):
+    """
+    Scores seed_matrix @ similarity in row chunks and keeps the top-K of every row.
+
+    Parameters:
+        keys (np.ndarray): Label of every row of seed_matrix.
+        key_name (str): Column name for the labels in the output.
+        seed_matrix (scipy.sparse.csr_matrix): (n_rows, n_movies) seed weights.
+        num_recommendations (int): Number of recommendations per row.
+        movie_neighbors (MovieNeighbors): Neighbour lists from build_movie_similarity.
+        exclude (scipy.sparse.csr_matrix): Optional (n_rows, n_movies) mask of movies to drop.
+        chunk_size (int): Rows scored per block; bounds memory at chunk_size x n_movies floats.
+
+    Returns:
+        pd.DataFrame: Long-format frame [key_name, "movieId", "score"], best match first per key.
+    """
+    # Multiply per chunk: the full product is as dense as the neighbourhoods of every seed
+    seed_matrix = seed_matrix.tocsr()
+    similarity = movie_neighbors.to_sparse()
+    frames = []
+
+    for start in range(0, seed_matrix.shape[0], chunk_size):
+        stop = min(start + chunk_size, seed_matrix.shape[0])
+        block = (seed_matrix[start:stop] @ similarity).toarray()
+        if exclude is not None:
+            block[exclude[start:stop].nonzero()] = 0
+
+        idx, top = top_k_rows(block, num_recommendations)
+        valid = top > 0
+        rows = np.nonzero(valid)[0]  # Row-major order keeps each key's results ranked
+        frames.append(pd.DataFrame({
+            key_name: keys[start + rows],
+            "movieId": movie_neighbors.movie_ids[idx[valid]],
+            "score": top[valid],
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=[key_name, "movieId", "score"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def recommend_movies_batch(seed_ids, num_recommendations, movie_neighbors, chunk_size=256):
+    """
+    Recommends similar movies for many seed movies with one sparse matrix product.
+
+    Parameters:
+        seed_ids (array-like): Seed movie IDs; seeds missing from the index yield no rows.
+        num_recommendations (int): Number of recommendations per seed.
+        movie_neighbors (MovieNeighbors): Neighbour lists from build_movie_similarity.
+        chunk_size (int): Seeds scored per block.
+
+    Returns:
+        pd.DataFrame: Columns ["seedId", "movieId", "score"], best match first per seed.
+    """
+    seed_ids = np.asarray(seed_ids)
+    rows = movie_neighbors.rows(seed_ids)
+    found = rows >= 0
+
+    seed_matrix = sparse.csr_matrix(
+        (np.ones(found.sum(), dtype=np.float32), (np.nonzero(found)[0], rows[found])),
+        shape=(len(seed_ids), len(movie_neighbors)),
+    )
+    return _ranked_batch(seed_ids, "seedId", seed_matrix, num_recommendations, movie_neighbors, chunk_size=chunk_size)
+
+
+def recommend_for_users(user_seeds, num_recommendations, movie_neighbors, ratings=None, chunk_size=256):
+    """
+    Builds one "because you watched" rail per user from that user's seed movies.
+
+    Candidate scores are the summed similarities to all of a user's seeds, and
+    the seeds themselves plus any movie the user has already rated are excluded.
+
+    Parameters:
+        user_seeds (dict): Mapping of userId to a list of seed movie IDs.
+        num_recommendations (int): Number of recommendations per user.
+        movie_neighbors (MovieNeighbors): Neighbour lists from build_movie_similarity.
+        ratings (pd.DataFrame): Optional ratings with ["userId", "movieId"] used for exclusion.
+        chunk_size (int): Users scored per block.
+
+    Returns:
+        pd.DataFrame: Columns ["userId", "movieId", "score"], best match first per user.
+    """
+    user_ids = np.fromiter(user_seeds.keys(), dtype=np.int64, count=len(user_seeds))
+    lengths = np.fromiter((len(seeds) for seeds in user_seeds.values()), dtype=np.int64, count=len(user_seeds))
+    seed_ids = np.concatenate([np.asarray(seeds, dtype=np.int64) for seeds in user_seeds.values()] or [np.empty(0, dtype=np.int64)])
+
+    user_rows = np.repeat(np.arange(len(user_ids)), lengths)
+    seed_rows = movie_neighbors.rows(seed_ids)
+    found = seed_rows >= 0
+    seed_matrix = sparse.csr_matrix(
+        (np.ones(found.sum(), dtype=np.float32), (user_rows[found], seed_rows[found])),
+        shape=(len(user_ids), len(movie_neighbors)),
+    )
+
+    exclude = seed_matrix
+    if ratings is not None:
+        rated = ratings[ratings["userId"].isin(user_ids)]
+        rated_users = pd.Index(user_ids).get_indexer(rated["userId"].to_numpy())
+        rated_rows = movie_neighbors.rows(rated["movieId"].to_numpy())
+        known = rated_rows >= 0
+        exclude = exclude + sparse.csr_matrix(
+            (np.ones(known.sum(), dtype=np.float32), (rated_users[known], rated_rows[known])),
+            shape=seed_matrix.shape,
+        )
+
+    return _ranked_batch(user_ids, "userId", seed_matrix, num_recommendations, movie_neighbors, exclude, chunk_size)
+
+
+def recommend_for_user(user_id, num_recommendations, user_similarity, movies):
+    """
+    Recommends movies to a user from the ratings of their most similar users.
+
+    A movie's score is the similarity-weighted sum of the neighbours' mean-centred
+    ratings, so movies liked by many close neighbours rank first. Movies the user
+    has already rated are never recommended.
+
+    Parameters:
+        user_id (int): The user ID for which recommendations are needed.
+        num_recommendations (int): Number of recommendations to return.
+        user_similarity (UserNeighbors): Neighbour lists from build_user_similarity.
+        movies (pd.DataFrame | dict): Movie metadata, or a title index from build_title_index.
+
+    Returns:
+        pd.DataFrame: Recommended movies with titles and scores, best match first.
+    """
+    if user_similarity is None:
+        print("❌ Error: User similarity data is missing!")
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+
+    row = user_similarity.row(user_id)
+    if row < 0:
+        print(f"❌ Error: User ID {user_id} not found in similarity index!")
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+
+    idx = user_similarity.neighbor_idx[row]
+    valid = idx >= 0
+    weights = user_similarity.neighbor_scores[row][valid]
+    scores = np.asarray(weights @ user_similarity.user_ratings[idx[valid]]).ravel()
+
+    # Drop movies the user has already rated
+    own = user_similarity.user_ratings[row]
+    scores[own.indices] = 0
 
-    # Get similar movies sorted by similarity score
-    similar_movies = movie_similarity.loc[movie_id].sort_values(ascending=False)[1:num_recommendations+1]
+    k = min(num_recommendations, int((scores > 0).sum()))
+    if k <= 0:
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
 
-    # Map movie IDs to titles
-    recommendations = movies[movies["movieId"].isin(similar_movies.index)][["movieId", "title"]]
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
 
-    return recommendations
+    titles = movies if isinstance(movies, dict) else build_title_index(movies)
+    movie_ids = user_similarity.movie_ids[top]
+    return pd.DataFrame({
+        "movieId": movie_ids,
+        "title": [titles.get(int(movie_id)) for movie_id in movie_ids],
+        "score": scores[top],
+    })
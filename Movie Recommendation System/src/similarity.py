@@ -1,5 +1,9 @@
+import os
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 
 def compute_movie_similarity(ratings):
     """
@@ -26,3 +30,366 @@ def compute_movie_similarity(ratings):
     )
 
     return similarity_matrix
+
+
+def build_rating_matrix(ratings):
+    """
+    Builds a sparse movie x user rating matrix without a dense pivot.
+
+    Parameters:
+        ratings (pd.DataFrame): User ratings dataset with columns ["userId", "movieId", "rating"].
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix, movie_ids, user_ids) where row i of the
+        matrix belongs to movie_ids[i] and column j to user_ids[j].
+    """
+    movie_ids, movie_rows = np.unique(ratings["movieId"].to_numpy(), return_inverse=True)
+    user_ids, user_cols = np.unique(ratings["userId"].to_numpy(), return_inverse=True)
+
+    matrix = sparse.csr_matrix(
+        (ratings["rating"].to_numpy(dtype=np.float32), (movie_rows, user_cols)),
+        shape=(len(movie_ids), len(user_ids)),
+    )
+    matrix.sum_duplicates()
+
+    return matrix, movie_ids, user_ids
+
+
+def top_k_rows(block, k):
+    """
+    Selects the k largest entries of every row of a dense block.
+
+    Parameters:
+        block (np.ndarray): 2-D array of scores.
+        k (int): Number of entries to keep per row.
+
+    Returns:
+        tuple: (indices, scores), both shaped (rows, k) and sorted by descending score.
+    """
+    k = min(k, block.shape[1])
+    idx = np.argpartition(-block, k - 1, axis=1)[:, :k]
+    scores = np.take_along_axis(block, idx, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+def sparse_top_k(matrix, k):
+    """
+    Selects the k largest stored entries of every row of a sparse matrix.
+
+    Parameters:
+        matrix (scipy.sparse.csr_matrix): Scores; only positive entries are kept.
+        k (int): Number of entries to keep per row.
+
+    Returns:
+        tuple: (indices, scores) shaped (n_rows, k), sorted descending and padded with -1 / 0.
+    """
+    matrix = matrix.tocsr()
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    cols, scores = matrix.indices, matrix.data
+    keep = scores > 0
+    rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+    order = np.lexsort((-scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+    keep = rank < k
+
+    neighbor_idx = np.full((matrix.shape[0], k), -1, dtype=np.int32)
+    neighbor_scores = np.zeros((matrix.shape[0], k), dtype=np.float32)
+    neighbor_idx[rows[keep], rank[keep]] = cols[keep]
+    neighbor_scores[rows[keep], rank[keep]] = scores[keep]
+    return neighbor_idx, neighbor_scores
+
+
+class NeighborLists:
+    """Top-K neighbour lists over a sorted array of IDs."""
+
+    def __init__(self, ids, neighbor_idx, neighbor_scores):
+        """
+        Parameters:
+            ids (np.ndarray): Sorted ID of every row.
+            neighbor_idx (np.ndarray): (n, k) int32 row numbers of the neighbours, -1 for padding.
+            neighbor_scores (np.ndarray): (n, k) float32 cosine scores, sorted descending per row.
+        """
+        self.ids = ids
+        self.neighbor_idx = neighbor_idx
+        self.neighbor_scores = neighbor_scores
+
+    @property
+    def k(self):
+        return self.neighbor_idx.shape[1]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, item_id):
+        """Returns the row of an ID, or -1 if it is not indexed."""
+        row = int(np.searchsorted(self.ids, item_id))
+        if row < len(self.ids) and self.ids[row] == item_id:
+            return row
+        return -1
+
+    def __contains__(self, item_id):
+        return self.row(item_id) >= 0
+
+    def rows(self, item_ids):
+        """
+        Vectorised row lookup.
+
+        Parameters:
+            item_ids (array-like): IDs to look up.
+
+        Returns:
+            np.ndarray: Row of every ID, -1 where it is not indexed.
+        """
+        item_ids = np.asarray(item_ids)
+        if len(self.ids) == 0:
+            return np.full(item_ids.shape, -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.ids, item_ids), len(self.ids) - 1)
+        return np.where(self.ids[rows] == item_ids, rows, -1)
+
+    def to_sparse(self):
+        """Returns the neighbour lists as an (n, n) CSR similarity matrix."""
+        valid = self.neighbor_idx >= 0
+        return sparse.csr_matrix(
+            (self.neighbor_scores[valid], (np.nonzero(valid)[0], self.neighbor_idx[valid])),
+            shape=(len(self), len(self)),
+        )
+
+    def neighbors(self, item_id, k=None):
+        """
+        Returns the stored neighbours of an ID.
+
+        Parameters:
+            item_id (int): The ID to look up.
+            k (int): Maximum number of neighbours, defaults to all stored.
+
+        Returns:
+            tuple: (ids, scores) in descending score order, padding removed.
+        """
+        row = self.row(item_id)
+        if row < 0:
+            raise KeyError(item_id)
+        idx = self.neighbor_idx[row, :k]
+        valid = idx >= 0
+        return self.ids[idx[valid]], self.neighbor_scores[row, :k][valid]
+
+
+class MovieNeighbors(NeighborLists):
+    """Top-K item-item neighbour lists keyed by movieId."""
+
+    @property
+    def movie_ids(self):
+        return self.ids
+
+
+class UserNeighbors(NeighborLists):
+    """Top-N user-user neighbour lists keyed by userId, plus the ratings needed to score movies."""
+
+    def __init__(self, user_ids, neighbor_idx, neighbor_scores, user_ratings, movie_ids):
+        """
+        Parameters:
+            user_ids (np.ndarray): Sorted userId of every row.
+            neighbor_idx (np.ndarray): (n_users, n) int32 row numbers of the neighbours, -1 for padding.
+            neighbor_scores (np.ndarray): (n_users, n) float32 similarity scores, sorted descending per row.
+            user_ratings (scipy.sparse.csr_matrix): (n_users, n_movies) mean-centred ratings.
+            movie_ids (np.ndarray): movieId of every column of user_ratings.
+        """
+        super().__init__(user_ids, neighbor_idx, neighbor_scores)
+        self.user_ratings = user_ratings
+        self.movie_ids = movie_ids
+
+    @property
+    def user_ids(self):
+        return self.ids
+
+
+def build_movie_similarity(ratings, top_k=50, chunk_size=512):
+    """
+    Computes top-K cosine neighbours for every movie on a sparse rating matrix.
+
+    Only chunk_size x n_movies scores are materialised at a time and only the
+    best top_k per movie are kept, so memory grows with the number of ratings
+    and movies instead of movies².
+
+    Parameters:
+        ratings (pd.DataFrame): User ratings dataset with columns ["userId", "movieId", "rating"].
+        top_k (int): Number of neighbours to keep per movie.
+        chunk_size (int): Number of movies scored per block.
+
+    Returns:
+        MovieNeighbors: Neighbour lists, or None if the ratings are empty.
+    """
+    if ratings is None or ratings.empty:
+        print("❌ Error: Ratings data is empty or missing!")
+        return None
+
+    matrix, movie_ids, _ = build_rating_matrix(ratings)
+    neighbor_idx, neighbor_scores = cosine_top_k(matrix, top_k, chunk_size)
+    return MovieNeighbors(movie_ids, neighbor_idx, neighbor_scores)
+
+
+def cosine_top_k(matrix, top_k, chunk_size=512):
+    """
+    Computes the top-K cosine neighbours of every row of a sparse matrix.
+
+    Parameters:
+        matrix (scipy.sparse.csr_matrix): One row per item.
+        top_k (int): Number of neighbours to keep per row.
+        chunk_size (int): Number of rows scored per block.
+
+    Returns:
+        tuple: (neighbor_idx, neighbor_scores) arrays shaped (n_rows, k), padded with -1 / 0.
+    """
+    matrix = normalize(matrix, norm="l2", axis=1, copy=False)
+    matrix_t = matrix.T.tocsr()
+
+    n_rows = matrix.shape[0]
+    k = max(min(top_k, n_rows - 1), 0)
+    neighbor_idx = np.full((n_rows, k), -1, dtype=np.int32)
+    neighbor_scores = np.zeros((n_rows, k), dtype=np.float32)
+    if k == 0:
+        return neighbor_idx, neighbor_scores
+
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+        block = (matrix[start:stop] @ matrix_t).toarray()
+
+        # A row is never its own neighbour
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        idx, scores = top_k_rows(block, k)
+        idx[scores <= 0] = -1
+        scores[scores <= 0] = 0
+        neighbor_idx[start:stop] = idx
+        neighbor_scores[start:stop] = scores
+
+    return neighbor_idx, neighbor_scores
+
+
+INDEX_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "index"))
+NEIGHBOR_FILES = ("movie_ids", "neighbor_idx", "neighbor_scores")
+
+
+def save_movie_neighbors(neighbors, index_dir=INDEX_DIR):
+    """
+    Writes neighbour lists to index_dir as raw .npy arrays.
+
+    Parameters:
+        neighbors (MovieNeighbors): Output of build_movie_similarity.
+        index_dir (str): Target directory, created if missing.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    # movie_ids goes last so watchers of its mtime only see a finished index
+    for name in NEIGHBOR_FILES[1:] + NEIGHBOR_FILES[:1]:
+        # Write then rename so a running app never maps a half-written file
+        tmp_path = os.path.join(index_dir, f"{name}.tmp.npy")
+        np.save(tmp_path, np.ascontiguousarray(getattr(neighbors, name)))
+        os.replace(tmp_path, os.path.join(index_dir, f"{name}.npy"))
+
+
+def load_movie_neighbors(index_dir=INDEX_DIR, mmap=True):
+    """
+    Loads neighbour lists written by save_movie_neighbors.
+
+    Parameters:
+        index_dir (str): Directory holding the .npy files.
+        mmap (bool): Memory-map the arrays read-only instead of reading them into RAM.
+
+    Returns:
+        MovieNeighbors: Neighbour lists, or None if the index does not exist.
+    """
+    paths = [os.path.join(index_dir, f"{name}.npy") for name in NEIGHBOR_FILES]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+
+    mmap_mode = "r" if mmap else None
+    return MovieNeighbors(*(np.load(path, mmap_mode=mmap_mode) for path in paths))
+
+
+def build_user_similarity(ratings, top_n=50, n_tables=8, n_bits=None, max_bucket=512, seed=0):
+    """
+    Finds approximate top-N neighbours for every user with random-hyperplane LSH.
+
+    Ratings are mean-centred per user and L2-normalised, so the dot product is
+    an adjusted cosine. Each of n_tables hash tables buckets users by the signs
+    of n_bits random projections; exact scores are only computed inside a
+    bucket (split into blocks of at most max_bucket users), so there is never a
+    dense users x users matrix. More tables raise recall, more bits cut cost.
+
+    Parameters:
+        ratings (pd.DataFrame): User ratings dataset with columns ["userId", "movieId", "rating"].
+        top_n (int): Number of neighbours to keep per user.
+        n_tables (int): Number of independent hash tables.
+        n_bits (int): Hyperplanes per table (2**n_bits buckets); by default chosen so
+            an average bucket holds about max_bucket / 2 users.
+        max_bucket (int): Largest block of users scored together.
+        seed (int): Seed for the random hyperplanes.
+
+    Returns:
+        UserNeighbors: Neighbour lists, or None if the ratings are empty.
+    """
+    if ratings is None or ratings.empty:
+        print("❌ Error: Ratings data is empty or missing!")
+        return None
+
+    matrix, movie_ids, user_ids = build_rating_matrix(ratings)
+    user_ratings = matrix.T.tocsr()
+
+    # Centre each user's ratings on their own mean
+    counts = np.diff(user_ratings.indptr)
+    means = np.asarray(user_ratings.sum(axis=1)).ravel() / np.maximum(counts, 1)
+    user_ratings.data -= np.repeat(means, counts).astype(np.float32)
+    normalized = normalize(user_ratings, norm="l2", axis=1)
+
+    n_users, n_movies = normalized.shape
+    if n_bits is None:
+        n_bits = max(0, int(np.ceil(np.log2(max(n_users / (max_bucket / 2), 1)))))
+    rng = np.random.default_rng(seed)
+    powers = (1 << np.arange(n_bits)).astype(np.int64)
+    pair_rows, pair_cols, pair_scores = [], [], []
+
+    for _ in range(n_tables):
+        planes = rng.standard_normal((n_movies, n_bits)).astype(np.float32)
+        codes = (np.asarray(normalized @ planes) > 0).astype(np.int64) @ powers
+        order = np.argsort(codes, kind="stable")
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+
+        for bucket in np.split(order, boundaries):
+            for start in range(0, len(bucket), max_bucket):
+                members = bucket[start:start + max_bucket]
+                if len(members) < 2:
+                    continue
+                rows = normalized[members]
+                block = (rows @ rows.T).toarray()
+                np.fill_diagonal(block, -np.inf)
+
+                idx, scores = top_k_rows(block, min(top_n, len(members) - 1))
+                pair_rows.append(np.repeat(members, idx.shape[1]))
+                pair_cols.append(members[idx].ravel())
+                pair_scores.append(scores.ravel())
+
+    neighbor_idx = np.full((n_users, top_n), -1, dtype=np.int32)
+    neighbor_scores = np.zeros((n_users, top_n), dtype=np.float32)
+
+    if pair_rows:
+        rows = np.concatenate(pair_rows)
+        cols = np.concatenate(pair_cols)
+        scores = np.concatenate(pair_scores)
+        keep = scores > 0
+        rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+        # The same pair can collide in several tables; keep it once
+        _, first = np.unique(rows.astype(np.int64) * n_users + cols, return_index=True)
+        rows, cols, scores = rows[first], cols[first], scores[first]
+
+        # Rank candidates per user and keep the best top_n
+        order = np.lexsort((-scores, rows))
+        rows, cols, scores = rows[order], cols[order], scores[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+        keep = rank < top_n
+        neighbor_idx[rows[keep], rank[keep]] = cols[keep]
+        neighbor_scores[rows[keep], rank[keep]] = scores[keep]
+
+    return UserNeighbors(user_ids, neighbor_idx, neighbor_scores, user_ratings, movie_ids)
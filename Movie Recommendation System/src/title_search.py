@@ -0,0 +1,200 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+TRAILING_ARTICLE = re.compile(r"^(.*), (The|A|An|Les|La|Le|L'|Il|Das|Der|Die|El)( \(.*\))?$")
+NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_title(title):
+    """Lowercases, strips accents/punctuation and moves trailing articles to the front."""
+    title = TRAILING_ARTICLE.sub(r"\2 \1\3", title.strip())
+    title = unicodedata.normalize("NFKD", title)
+    title = "".join(char for char in title if not unicodedata.combining(char))
+    return NON_ALNUM.sub(" ", title.lower()).strip()
+
+
+def trigrams(text):
+    """Word-padded character trigrams of normalised text."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TitleIndex:
+    """
+    Autocomplete index over movie titles.
+
+    Prefix matches on the whole title, or on a title word for every query
+    word, come from binary searches over sorted arrays; typo-tolerant matches
+    come from the posting lists of the query's rarest trigrams. No query scans
+    the full title list, and the work per query is capped independently of the
+    catalogue size.
+    """
+
+    def __init__(self, movies, max_prefix_candidates=2000, max_fuzzy_grams=8, max_fuzzy_candidates=2000):
+        """
+        Parameters:
+            movies (pd.DataFrame): Movie metadata with columns ["movieId", "title"].
+            max_prefix_candidates (int): Cap on prefix hits scored per query (matters for 1-2 letter
+                queries and for multi-word queries whose rarest word is still common).
+            max_fuzzy_grams (int): Fuzzy candidates come from at most this many of the query's rarest trigrams.
+            max_fuzzy_candidates (int): Cap on the posting entries merged per query. When even the
+                rarest trigram is in more titles than this, its list is truncated to the first
+                max_fuzzy_candidates titles, so fuzzy recall for queries made only of common
+                trigrams depends on catalogue order; prefix matches are unaffected.
+        """
+        self.movie_ids = movies["movieId"].to_numpy()
+        self.titles = movies["title"].astype(str).to_numpy(dtype=object)
+        normalized = [normalize_title(title) for title in self.titles]
+        self.normalized = np.asarray(normalized, dtype=object)
+        self.max_prefix_candidates = max_prefix_candidates
+        self.max_fuzzy_grams = max_fuzzy_grams
+        self.max_fuzzy_candidates = max_fuzzy_candidates
+
+        # Sorted full titles for title-prefix search
+        order = np.argsort(np.asarray(normalized, dtype=str), kind="stable")
+        self.sorted_titles = np.asarray(normalized, dtype=str)[order]
+        self.sorted_title_rows = order.astype(np.int32)
+
+        # Sorted (word, row) pairs for word-prefix search, and the trigram ids of every title
+        words, word_rows = [], []
+        postings = defaultdict(list)
+        self.gram_ids = {}
+        title_grams = []
+        self.trigram_counts = np.zeros(len(normalized), dtype=np.int32)
+        for row, title in enumerate(normalized):
+            for word in set(title.split()):
+                words.append(word)
+                word_rows.append(row)
+            grams = trigrams(title)
+            self.trigram_counts[row] = len(grams)
+            for gram in grams:
+                title_grams.append(self.gram_ids.setdefault(gram, len(self.gram_ids)))
+                postings[gram].append(row)
+
+        order = np.argsort(np.asarray(words, dtype=str), kind="stable")
+        self.sorted_words = np.asarray(words, dtype=str)[order]
+        self.sorted_word_rows = np.asarray(word_rows, dtype=np.int32)[order]
+
+        # Row r's trigram ids are title_grams[gram_offsets[r]:gram_offsets[r + 1]]
+        self.title_grams = np.asarray(title_grams, dtype=np.int32)
+        self.gram_offsets = np.concatenate(([0], np.cumsum(self.trigram_counts, dtype=np.int64)))
+        self.postings = {gram: np.asarray(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def _prefix_rows(self, sorted_keys, rows, prefix):
+        start = np.searchsorted(sorted_keys, prefix, side="left")
+        stop = np.searchsorted(sorted_keys, prefix + "\uffff", side="left")
+        return rows[start:min(stop, start + self.max_prefix_candidates)]
+
+    def _word_prefix_rows(self, words):
+        """
+        Rows with a title word starting with each query word. Candidates come
+        from the query word with the fewest matches, capped at
+        max_prefix_candidates, and are checked against the other words.
+        """
+        ranges = [(np.searchsorted(self.sorted_words, word, side="left"),
+                   np.searchsorted(self.sorted_words, word + "\uffff", side="left")) for word in words]
+        rarest = min(range(len(words)), key=lambda i: ranges[i][1] - ranges[i][0])
+        start, stop = ranges[rarest]
+        rows = self.sorted_word_rows[start:min(stop, start + self.max_prefix_candidates)]
+        others = words[:rarest] + words[rarest + 1:]
+        if not others or not len(rows):
+            return rows
+        keep = np.fromiter(
+            (all(any(title_word.startswith(word) for title_word in self.normalized[row].split()) for word in others)
+             for row in rows),
+            dtype=bool, count=len(rows),
+        )
+        return rows[keep]
+
+    def _fuzzy_rows(self, grams):
+        """
+        Titles sharing one of the query's rarest trigrams, from at most
+        max_fuzzy_grams posting lists and max_fuzzy_candidates entries; common
+        trigrams carry little signal and are left to prefix search. The rarest
+        list is always used, truncated to the cap if it is longer.
+        """
+        lists = []
+        total = 0
+        for posting in sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len):
+            if lists and (len(lists) == self.max_fuzzy_grams or total + len(posting) > self.max_fuzzy_candidates):
+                break
+            lists.append(posting[:self.max_fuzzy_candidates])
+            total += len(lists[-1])
+        return np.concatenate(lists) if lists else np.empty(0, dtype=np.int32)
+
+    def _similarity(self, rows, grams):
+        """
+        Trigram similarity between the query and each of rows, scored through
+        the titles' own trigram ids. Mostly rewards covering the query (so long
+        titles are not penalised for what the user has not typed yet), with
+        Dice similarity as a tie-breaker.
+        """
+        counts = self.trigram_counts[rows]
+        # Positions of every candidate's trigram ids in title_grams, one run per candidate
+        starts = np.cumsum(counts) - counts
+        positions = np.arange(counts.sum()) + np.repeat(self.gram_offsets[rows] - starts, counts)
+        in_query = np.zeros(len(self.gram_ids), dtype=bool)
+        in_query[[self.gram_ids[gram] for gram in grams if gram in self.gram_ids]] = True
+        common = np.add.reduceat(in_query[self.title_grams[positions]], starts, dtype=np.int32)
+
+        coverage = common / len(grams)
+        dice = 2 * common / (len(grams) + counts)
+        return 0.7 * coverage + 0.3 * dice
+
+    def search(self, query, limit=10, min_score=0.3):
+        """
+        Finds titles matching a partial or misspelt query.
+
+        Title-prefix matches rank first, then titles with a word starting with
+        every query word, then fuzzy matches; each group is ordered by trigram
+        similarity.
+
+        Parameters:
+            query (str): What the user has typed so far.
+            limit (int): Maximum number of results.
+            min_score (float): Minimum trigram similarity for fuzzy-only matches.
+
+        Returns:
+            list: (movieId, title, score) tuples, best match first.
+        """
+        normalized = normalize_title(query)
+        if not normalized:
+            return []
+
+        grams = trigrams(normalized)
+        fuzzy_hits = self._fuzzy_rows(grams)
+
+        # Prefix hits are boosted; ones the fuzzy pass missed (very short queries) are added.
+        # Rows are merged through one sort of (row << 2 | boost) keys rather than set
+        # operations, which hash and cost more than the whole query at these sizes.
+        word_hits = self._word_prefix_rows(normalized.split())
+        title_hits = self._prefix_rows(self.sorted_titles, self.sorted_title_rows, normalized)
+        keys = np.sort(np.concatenate((
+            fuzzy_hits.astype(np.int64) << 2,
+            word_hits.astype(np.int64) << 2 | 1,
+            title_hits.astype(np.int64) << 2 | 2,
+        )))
+        last = np.r_[keys[1:] >> 2 != keys[:-1] >> 2, True]  # Each row's highest boost sorts last
+        rows, boost = keys[last] >> 2, keys[last] & 3
+        if not len(rows):
+            return []
+
+        total = self._similarity(rows, grams) + boost
+        keep = total >= min_score
+        rows, total = rows[keep], total[keep]
+        if not len(rows):
+            return []
+
+        k = min(limit, len(rows))
+        top = np.argpartition(-total, k - 1)[:k]
+        top = top[np.lexsort((self.trigram_counts[rows[top]], -total[top]))]
+        return [(int(self.movie_ids[row]), self.titles[row], float(total[i])) for i, row in zip(top, rows[top])]
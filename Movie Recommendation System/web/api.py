@@ -0,0 +1,204 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from flask import Flask, jsonify, request
+
+# Ensure the project root is in Python's module search path so `src` imports as a package
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from src.cache import LRUCache
+from src.content import build_hybrid_similarity
+from src.data_loader import load_data, load_movies
+from src.recommender import build_title_index, recommend_movies_batch, top_k_similar
+from src.similarity import INDEX_DIR, load_movie_neighbors, save_movie_neighbors
+from src.title_search import TitleIndex
+
+MAX_RECOMMENDATIONS = 100
+
+app = Flask(__name__)
+cache = LRUCache(
+    max_size=int(os.getenv("CACHE_SIZE", 50000)),
+    ttl=float(os.getenv("CACHE_TTL", 600)),
+)
+
+
+class IndexState:
+    """Holds the memory-mapped neighbour index and reloads it when build_index.py rewrites it."""
+
+    def __init__(self, index_dir=INDEX_DIR, check_interval=1.0):
+        self.index_dir = index_dir
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.neighbors = None
+        self.stamp = None
+        self.checked_at = 0.0
+        self.reloads = 0
+
+    def _stamp(self):
+        path = os.path.join(self.index_dir, "movie_ids.npy")
+        return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+    def load(self, force=False):
+        """(Re)loads the index if it changed on disk, clearing cached results; returns (neighbors, stamp)."""
+        with self.lock:
+            stamp = self._stamp()
+            if stamp is None:
+                movies, ratings = load_data()
+                save_movie_neighbors(build_hybrid_similarity(movies, ratings), self.index_dir)
+                stamp = self._stamp()
+            if force or stamp != self.stamp:
+                self.neighbors = load_movie_neighbors(self.index_dir)
+                self.stamp = stamp
+                self.reloads += 1
+                cache.clear()
+            self.checked_at = time.monotonic()
+            return self.neighbors, self.stamp
+
+    def current(self):
+        """
+        Returns (neighbors, stamp), checking for a rebuild at most once per
+        check_interval. Both are read under the lock so the stamp is the one
+        the returned index was loaded with.
+        """
+        with self.lock:
+            if self.neighbors is not None and time.monotonic() - self.checked_at <= self.check_interval:
+                return self.neighbors, self.stamp
+        return self.load()
+
+
+index_state = IndexState()
+movies = load_movies(columns=["movieId", "title"])
+titles = build_title_index(movies)
+title_index = TitleIndex(movies)
+latencies = {}
+
+
+def record_latency(endpoint, started):
+    """Keeps the last 10k request latencies per endpoint."""
+    latencies.setdefault(endpoint, deque(maxlen=10000)).append(time.perf_counter() - started)
+
+
+def as_payload(similar_ids, scores):
+    return [
+        {"movieId": int(movie_id), "title": titles.get(int(movie_id)), "score": float(score)}
+        for movie_id, score in zip(similar_ids, scores)
+    ]
+
+
+def parse_k(value):
+    k = int(value if value is not None else 10)
+    if not 1 <= k <= MAX_RECOMMENDATIONS:
+        raise ValueError(f"k must be between 1 and {MAX_RECOMMENDATIONS}")
+    return k
+
+
+@app.route("/recommend", methods=["GET"])
+def recommend():
+    """Returns the top-k similar movies for one movieId."""
+    started = time.perf_counter()
+    try:
+        movie_id = int(request.args["movie_id"])
+        k = parse_k(request.args.get("k"))
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+
+    # Keys carry the version of the index used to answer, so results cached by a
+    # request that raced a reload are never served against the new index
+    neighbors, stamp = index_state.current()
+    key = (stamp, movie_id, k)
+    recommendations = cache.get(key)
+    if recommendations is None:
+        similar = top_k_similar(movie_id, k, neighbors)
+        if similar is None:
+            return jsonify({"error": f"Movie ID {movie_id} not found"}), 404
+        recommendations = as_payload(*similar)
+        cache.set(key, recommendations)
+
+    record_latency("recommend", started)
+    return jsonify({"movieId": movie_id, "recommendations": recommendations})
+
+
+@app.route("/recommend/batch", methods=["POST"])
+def recommend_batch():
+    """Returns top-k similar movies for many movieIds, computing only cache misses."""
+    started = time.perf_counter()
+    data = request.get_json(silent=True) or {}
+    try:
+        movie_ids = [int(movie_id) for movie_id in data["movie_ids"]]
+        k = parse_k(data.get("k"))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+
+    neighbors, stamp = index_state.current()
+    results = {movie_id: cache.get((stamp, movie_id, k)) for movie_id in movie_ids}
+    misses = [movie_id for movie_id, cached in results.items() if cached is None]
+
+    if misses:
+        rails = recommend_movies_batch(np.asarray(misses), k, neighbors)
+        for movie_id, rail in rails.groupby("seedId", sort=False):
+            results[int(movie_id)] = as_payload(rail["movieId"], rail["score"])
+        for movie_id in misses:
+            if results[movie_id] is None and movie_id in neighbors:
+                results[movie_id] = []
+            if results[movie_id] is not None:
+                cache.set((stamp, movie_id, k), results[movie_id])
+
+    record_latency("recommend_batch", started)
+    return jsonify({
+        "recommendations": {str(movie_id): rail for movie_id, rail in results.items() if rail is not None},
+        "not_found": [movie_id for movie_id, rail in results.items() if rail is None],
+    })
+
+
+@app.route("/search", methods=["GET"])
+def search():
+    """Autocompletes a partial or misspelt title to ranked movieIds."""
+    started = time.perf_counter()
+    try:
+        limit = parse_k(request.args.get("limit"))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+
+    matches = title_index.search(request.args.get("q", ""), limit=limit)
+    record_latency("search", started)
+    return jsonify({"results": [
+        {"movieId": movie_id, "title": title, "score": score} for movie_id, title, score in matches
+    ]})
+
+
+@app.route("/reload", methods=["POST"])
+def reload_index():
+    """Forces a reload of the index from disk and drops cached results."""
+    neighbors, _ = index_state.load(force=True)
+    return jsonify({"movies": len(neighbors), "reloads": index_state.reloads})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Exposes cache counters and per-endpoint latency percentiles."""
+    latency = {}
+    for endpoint, samples in latencies.items():
+        timings = np.fromiter(samples, dtype=np.float64) * 1e3
+        latency[endpoint] = {
+            "count": len(timings),
+            "p50_ms": float(np.percentile(timings, 50)),
+            "p99_ms": float(np.percentile(timings, 99)),
+        }
+    return jsonify({"cache": cache.stats(), "latency": latency, "index_reloads": index_state.reloads})
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    return jsonify({"status": "ok", "movies": len(index_state.current()[0])})
+
+
+if __name__ == "__main__":
+    index_state.load()
+    port = int(os.getenv("PORT", 5002))
+    app.run(host="0.0.0.0", port=port, threaded=True)
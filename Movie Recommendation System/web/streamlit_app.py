@@ -7,47 +7,62 @@ import pandas as pd
 # Get the root directory of the project
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
-# Ensure `src` is in Python's module search path
-SRC_DIR = os.path.join(ROOT_DIR, "src")
-if SRC_DIR not in sys.path:
-    sys.path.append(SRC_DIR)
+# Ensure the project root is in Python's module search path so `src` imports as a package
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
 
 # Try importing modules
 try:
-    from data_loader import load_data
-    from similarity import compute_movie_similarity
-    from recommender import recommend_movies
+    from src.data_loader import load_movies, load_ratings
+    from src.content import build_hybrid_similarity
+    from src.similarity import load_movie_neighbors, save_movie_neighbors
+    from src.recommender import build_title_index, recommend_movies
+    from src.title_search import TitleIndex
 except ModuleNotFoundError as e:
     st.error(f"❌ Module import error: {e}")
     st.stop()
 
-# Load data
-df_movies, df_ratings = load_data()
 
-# Compute similarity matrix
-movie_similarity = compute_movie_similarity(df_ratings)
+@st.cache_resource
+def load_resources():
+    """Load movie data and the similarity index once per process, not on every rerun."""
+    df_movies = load_movies()
+
+    # Memory-map the prebuilt index (see build_index.py); ratings are only parsed to build it if missing
+    movie_neighbors = load_movie_neighbors()
+    if movie_neighbors is None:
+        movie_neighbors = build_hybrid_similarity(df_movies, load_ratings())
+        save_movie_neighbors(movie_neighbors)
+
+    return df_movies, movie_neighbors, build_title_index(df_movies), TitleIndex(df_movies)
+
+
+df_movies, movie_similarity, movie_titles, title_index = load_resources()
 
 # Streamlit UI
 st.title("🎬 Movie Recommendation System")
 st.write("Get personalized movie recommendations!")
 
-# Movie selection
-movie_list = df_movies["title"].tolist()
-selected_movie = st.selectbox("Select a movie you liked:", movie_list)
+# Movie selection: autocomplete over the title index instead of listing every title
+query = st.text_input("Search for a movie you liked:")
+matches = title_index.search(query, limit=20) if query else []
+selected_movie = st.selectbox(
+    "Select a movie you liked:",
+    [movie_id for movie_id, _, _ in matches],
+    format_func=lambda movie_id: movie_titles.get(movie_id, str(movie_id)),
+)
 
 # Number of recommendations
 num_recommendations = st.slider("Number of recommendations:", 1, 10, 5)
 
 # Get recommendations
 if st.button("Get Recommendations"):
-    movie_row = df_movies[df_movies["title"] == selected_movie]
-
-    if movie_row.empty:
-        st.warning("⚠️ Movie not found. Try selecting another movie.")
+    if selected_movie is None:
+        st.warning("⚠️ Movie not found. Try searching for another movie.")
     else:
-        movie_id = int(movie_row["movieId"].values[0])
-        recommendations = recommend_movies(movie_id, num_recommendations, movie_similarity, df_ratings, df_movies)
+        movie_id = int(selected_movie)
+        recommendations = recommend_movies(movie_id, num_recommendations, movie_similarity, None, movie_titles)
 
         if recommendations.empty:
             st.warning("No recommendations found. Try another movie.")